@@ -1,5 +1,12 @@
-import pygame
+import io
+import os
+import time
+import argparse
 import json
+import struct
+import hashlib
+import random
+import pygame
 ## [C] Team Flames 20XX
 # Constants
 SCREEN_WIDTH = 800
@@ -11,52 +18,170 @@ IDLE = 'idle'
 WALKING = 'walking'
 JUMPING = 'jumping'
 
+# Keys (left, right, jump) and character per player; extra players take turns reusing them
+PLAYER_CONTROLS = [
+    (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE),  # Mario
+    (pygame.K_a, pygame.K_d, pygame.K_w),  # Luigi
+]
+PLAYER_CHARACTERS = ['mario', 'luigi']
+ENEMY_CHARACTERS = ['goomba', 'koopa']
+
+# Fixed-timestep loop: physics and animation advance in steps of this length
+PHYSICS_STEP = 1 / 60
+PHYSICS_STEP_MS = PHYSICS_STEP * 1000
+MAX_FRAME_TIME = 0.25  # Longest frame fed to the accumulator, so a stall can't snowball
+MAX_RENDER_FPS = 0  # 0 renders as often as the machine allows
+
+# Sprite atlas: JSON manifest compiled to a binary cache of ready-to-blit pixels
+ATLAS_MANIFEST = "sprites.json"
+ATLAS_MAGIC = b"MFATLAS1"
+ATLAS_HEADER = struct.Struct("<8s32sI")  # magic, source sha256, index length; then index and pixels
+ATLAS_PIXEL_FORMAT = "BGRA"  # Matches convert_alpha() surfaces on common displays
+
+class FrameRegistry:
+    """Process-wide registry of sprite sheet frames, so each region is sliced, scaled and flipped only once."""
+    def __init__(self):
+        self.regions = {}
+        self.animations = {}
+        self.animation_sets = {}
+        self.characters = {}
+
+    def get_region(self, sprite_sheet, rect):
+        key = (sprite_sheet.filename, rect)
+        frame = self.regions.get(key)
+        if frame is None:
+            frame = sprite_sheet.get_sprite(*rect)
+            self.regions[key] = frame
+        return frame
+
+    def get_animation(self, sprite_sheet, character, state, scale=1, facing_right=True):
+        """Get shared frames for a character's animation state, building them on first use."""
+        key = (sprite_sheet.filename, character, state, scale, facing_right)
+        frames = self.animations.get(key)
+        if frames is None:
+            frames = []
+            for rect in sprite_sheet.sprite_locations.get(character, {}).get(state, ()):
+                frame = self.get_region(sprite_sheet, rect)
+                if scale != 1:
+                    frame = pygame.transform.scale(frame, (frame.get_width() * scale, frame.get_height() * scale))
+                if not facing_right:
+                    frame = pygame.transform.flip(frame, True, False)
+                frames.append(frame)
+            self.animations[key] = frames
+        return frames
+
+    def get_animation_set(self, sprite_sheet, character, scale=1, facing_right=True):
+        """Get one shared {state: frames} mapping per character, scale and facing."""
+        key = (sprite_sheet.filename, character, scale, facing_right)
+        animation_set = self.animation_sets.get(key)
+        if animation_set is None:
+            animation_set = {
+                state: self.get_animation(sprite_sheet, character, state, scale, facing_right)
+                for state in (IDLE, WALKING, JUMPING)
+            }
+            self.animation_sets[key] = animation_set
+        return animation_set
+
+    def get_character(self, sprite_sheet, character, scale=1):
+        """Get everything a new sprite needs in one lookup: (animations, flipped animations, width, height)."""
+        key = (sprite_sheet.filename, character, scale)
+        entry = self.characters.get(key)
+        if entry is None:
+            animations = self.get_animation_set(sprite_sheet, character, scale, True)
+            flipped_animations = self.get_animation_set(sprite_sheet, character, scale, False)
+            first_frame = (animations[IDLE] or animations[WALKING])[0]  # Enemies have no idle frames
+            entry = (animations, flipped_animations, first_frame.get_width(), first_frame.get_height())
+            self.characters[key] = entry
+        return entry
+
+FRAME_REGISTRY = FrameRegistry()
+
 class SpriteSheet:
-    def __init__(self, filename):
-        self.sprite_sheet = pygame.image.load(filename).convert_alpha()
-        
+    def __init__(self, manifest_path):
+        with open(manifest_path, "rb") as file:
+            manifest_data = file.read()
+        manifest = json.loads(manifest_data)
+        directory = os.path.dirname(manifest_path)
+        self.filename = os.path.join(directory, manifest["image"])
+        self.cache_path = os.path.splitext(manifest_path)[0] + ".atlas"
+
         # Sprite dimensions from the sheet
-        self.SPRITE_WIDTH = 16
-        self.SPRITE_HEIGHT = 32
-        
-        # Define sprite locations in the sheet
+        self.SPRITE_WIDTH = manifest["sprite_width"]
+        self.SPRITE_HEIGHT = manifest["sprite_height"]
+
+        # Sprite locations in the sheet, per character and animation state
         self.sprite_locations = {
-            'mario': {
-                IDLE: [(0, 0, 16, 32)],
-                WALKING: [(x * 16, 0, 16, 32) for x in range(3)],
-                JUMPING: [(48, 0, 16, 32)]
-            },
-            'luigi': {
-                IDLE: [(0, 32, 16, 32)],
-                WALKING: [(x * 16, 32, 16, 32) for x in range(3)],
-                JUMPING: [(48, 32, 16, 32)]
-            },
-            'goomba': {
-                WALKING: [(x * 16, 64, 16, 16) for x in range(2)]
-            },
-            'koopa': {
-                WALKING: [(x * 16, 80, 16, 24) for x in range(2)]
-            }
+            character: {state: [tuple(rect) for rect in rects] for state, rects in states.items()}
+            for character, states in manifest["characters"].items()
         }
 
+        with open(self.filename, "rb") as file:
+            image_data = file.read()
+        source_hash = hashlib.sha256(manifest_data + image_data).digest()
+        self.frames = self.load_atlas(source_hash)
+        if self.frames is None:
+            self.frames = self.compile_atlas(image_data, source_hash)
+
+    def load_atlas(self, source_hash):
+        """Load frames from the binary cache with a single read, or None if it is missing or stale."""
+        try:
+            with open(self.cache_path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        if len(data) < ATLAS_HEADER.size:
+            return None
+        magic, cached_hash, index_length = ATLAS_HEADER.unpack_from(data)
+        if magic != ATLAS_MAGIC or cached_hash != source_hash:
+            return None
+
+        # Surfaces share the cache's memory instead of copying pixels
+        pixels = memoryview(data)
+        pixels_start = ATLAS_HEADER.size + index_length
+        index = json.loads(bytes(pixels[ATLAS_HEADER.size:pixels_start]))
+        frames = {}
+        for x, y, width, height, offset in index:
+            start = pixels_start + offset
+            frames[(x, y, width, height)] = pygame.image.frombuffer(
+                pixels[start:start + width * height * 4], (width, height), ATLAS_PIXEL_FORMAT)
+        return frames
+
+    def compile_atlas(self, image_data, source_hash):
+        """Decode and slice the sheet image, then write every frame's pixels to the binary cache."""
+        sheet = pygame.image.load(io.BytesIO(image_data), self.filename).convert_alpha()
+        rects = sorted({rect for states in self.sprite_locations.values()
+                        for rects in states.values() for rect in rects})
+        blobs = [pygame.image.tobytes(sheet.subsurface(rect), ATLAS_PIXEL_FORMAT) for rect in rects]
+
+        index = []
+        offset = 0
+        for rect, blob in zip(rects, blobs):
+            index.append([*rect, offset])
+            offset += len(blob)
+        index_data = json.dumps(index).encode()
+
+        data = ATLAS_HEADER.pack(ATLAS_MAGIC, source_hash, len(index_data)) + index_data + b"".join(blobs)
+        try:
+            with open(self.cache_path, "wb") as file:
+                file.write(data)
+        except OSError as e:
+            print(f"Could not write sprite atlas cache: {e}")
+        return {rect: sheet.subsurface(rect).copy() for rect in rects}
+
     def get_sprite(self, x, y, width, height):
-        """Extract a single sprite from the sheet."""
-        sprite = pygame.Surface((width, height), pygame.SRCALPHA)
-        sprite.blit(self.sprite_sheet, (0, 0), (x, y, width, height))
-        return sprite
+        """Get a single sprite from the atlas."""
+        return self.frames[(x, y, width, height)]
 
     def get_animation_frames(self, character, state):
         """Get all frames for a character's animation state."""
-        frames = []
-        if character in self.sprite_locations and state in self.sprite_locations[character]:
-            for rect in self.sprite_locations[character][state]:
-                frames.append(self.get_sprite(*rect))
-        return frames
+        return list(FRAME_REGISTRY.get_animation(self, character, state))
 
 class AnimatedSprite:
     def __init__(self, sprite_sheet, character, x, y, scale=2):
         self.x = x
         self.y = y
+        self.previous_x = x
+        self.previous_y = y
         self.scale = scale
         self.velocity_x = 0
         self.velocity_y = 0
@@ -64,22 +189,18 @@ class AnimatedSprite:
         self.character = character
         self.current_state = IDLE
         
-        # Load animations
-        self.animations = {
-            IDLE: sprite_sheet.get_animation_frames(character, IDLE),
-            WALKING: sprite_sheet.get_animation_frames(character, WALKING),
-            JUMPING: sprite_sheet.get_animation_frames(character, JUMPING)
-        }
+        # Pre-scaled animations for both facings and the sprite size, shared through the frame registry
+        self.animations, self.flipped_animations, self.width, self.height = FRAME_REGISTRY.get_character(
+            sprite_sheet, character, scale)
         
         # Animation properties
         self.current_frame = 0
         self.animation_timer = 0
         self.animation_speed = 100  # milliseconds per frame
-        
-        # Set initial sprite dimensions based on first frame
-        first_frame = self.animations[IDLE][0]
-        self.width = first_frame.get_width() * scale
-        self.height = first_frame.get_height() * scale
+
+    def state_frames(self, animations):
+        """Frames of the current state, falling back to walking for states without frames (enemies never idle)."""
+        return animations[self.current_state] or animations[WALKING]
 
     def update(self, dt):
         """Update sprite animation and position."""
@@ -87,39 +208,66 @@ class AnimatedSprite:
         self.animation_timer += dt
         if self.animation_timer >= self.animation_speed:
             self.animation_timer = 0
-            self.current_frame = (self.current_frame + 1) % len(self.animations[self.current_state])
+            self.current_frame = (self.current_frame + 1) % len(self.state_frames(self.animations))
         
         # Update position
         self.x += self.velocity_x
         self.y += self.velocity_y
 
-    def draw(self, surface):
-        """Draw the sprite with current animation frame."""
-        current_sprite = self.animations[self.current_state][self.current_frame]
-        
-        # Scale sprite
-        scaled_sprite = pygame.transform.scale(current_sprite, 
-                                            (self.width, self.height))
-        
-        # Flip sprite if facing left
-        if not self.facing_right:
-            scaled_sprite = pygame.transform.flip(scaled_sprite, True, False)
-        
-        surface.blit(scaled_sprite, (self.x, self.y))
+    def draw(self, surface, alpha=1.0):
+        """Draw the sprite with current animation frame, between its previous and current positions."""
+        animations = self.animations if self.facing_right else self.flipped_animations
+        frames = self.state_frames(animations)
+        x = self.previous_x + (self.x - self.previous_x) * alpha
+        y = self.previous_y + (self.y - self.previous_y) * alpha
+        surface.blit(frames[self.current_frame % len(frames)], (x, y))
+
+class ScriptedInput:
+    """Replays a looping script of (frames, keys) steps in place of pygame.key for headless runs."""
+    def __init__(self, script):
+        self.frames = [frozenset(keys) for count, keys in script for _ in range(count)]
+        self.frame = 0
+
+    def get_pressed(self):
+        keys = self.frames[self.frame % len(self.frames)]
+        self.frame += 1
+        return ScriptedKeys(keys)
+
+class ScriptedKeys:
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+# Default headless input: both players run right, jump, run back left, then stand still
+HEADLESS_SCRIPT = [
+    (60, [pygame.K_RIGHT, pygame.K_d]),
+    (10, [pygame.K_RIGHT, pygame.K_d, pygame.K_SPACE, pygame.K_w]),
+    (60, [pygame.K_LEFT, pygame.K_a]),
+    (30, []),
+]
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False):
+        # Headless runs use SDL's dummy video driver, so no window is ever shown
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        self.input_source = pygame.key
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Super Mario World with Sprites")
         self.clock = pygame.time.Clock()
         
         # Load sprite sheet
-        self.sprite_sheet = SpriteSheet("sprites.png")
+        self.sprite_sheet = SpriteSheet(ATLAS_MANIFEST)
         
         # Create characters
-        self.mario = AnimatedSprite(self.sprite_sheet, 'mario', 100, 500)
-        self.luigi = AnimatedSprite(self.sprite_sheet, 'luigi', 200, 500)
+        self.players = [
+            AnimatedSprite(self.sprite_sheet, 'mario', 100, 500),
+            AnimatedSprite(self.sprite_sheet, 'luigi', 200, 500)
+        ]
         
         # Create enemies
         self.enemies = [
@@ -132,53 +280,49 @@ class Game:
         self.jump_force = -15
         self.move_speed = 5
 
+    def load_scenario(self, enemies=2, players=2, seed=0):
+        """Replace the players and enemies with a seeded stress scenario."""
+        random.seed(seed)
+        self.players = [
+            AnimatedSprite(self.sprite_sheet, PLAYER_CHARACTERS[i % len(PLAYER_CHARACTERS)],
+                           (100 + 100 * i) % SCREEN_WIDTH, 500)
+            for i in range(players)
+        ]
+        self.enemies = [
+            AnimatedSprite(self.sprite_sheet, random.choice(ENEMY_CHARACTERS), random.randrange(SCREEN_WIDTH), 500)
+            for _ in range(enemies)
+        ]
+
     def handle_input(self):
-        keys = pygame.key.get_pressed()
+        keys = self.input_source.get_pressed()
         
-        # Mario controls
-        if keys[pygame.K_LEFT]:
-            self.mario.velocity_x = -self.move_speed
-            self.mario.facing_right = False
-            self.mario.current_state = WALKING
-        elif keys[pygame.K_RIGHT]:
-            self.mario.velocity_x = self.move_speed
-            self.mario.facing_right = True
-            self.mario.current_state = WALKING
-        else:
-            self.mario.velocity_x = 0
-            self.mario.current_state = IDLE
-            
-        if keys[pygame.K_SPACE] and self.mario.velocity_y == 0:
-            self.mario.velocity_y = self.jump_force
-            self.mario.current_state = JUMPING
-            
-        # Luigi controls (for multiplayer)
-        if keys[pygame.K_a]:
-            self.luigi.velocity_x = -self.move_speed
-            self.luigi.facing_right = False
-            self.luigi.current_state = WALKING
-        elif keys[pygame.K_d]:
-            self.luigi.velocity_x = self.move_speed
-            self.luigi.facing_right = True
-            self.luigi.current_state = WALKING
-        else:
-            self.luigi.velocity_x = 0
-            self.luigi.current_state = IDLE
-            
-        if keys[pygame.K_w] and self.luigi.velocity_y == 0:
-            self.luigi.velocity_y = self.jump_force
-            self.luigi.current_state = JUMPING
+        # Mario and Luigi controls (for multiplayer)
+        for i, player in enumerate(self.players):
+            left, right, jump = PLAYER_CONTROLS[i % len(PLAYER_CONTROLS)]
+            if keys[left]:
+                player.velocity_x = -self.move_speed
+                player.facing_right = False
+                player.current_state = WALKING
+            elif keys[right]:
+                player.velocity_x = self.move_speed
+                player.facing_right = True
+                player.current_state = WALKING
+            else:
+                player.velocity_x = 0
+                player.current_state = IDLE
+                
+            if keys[jump] and player.velocity_y == 0:
+                player.velocity_y = self.jump_force
+                player.current_state = JUMPING
 
     def update(self):
-        dt = self.clock.get_time()
-        
         # Update characters
-        for character in [self.mario, self.luigi] + self.enemies:
+        for character in self.players + self.enemies:
             # Apply gravity
             character.velocity_y += self.gravity
             
-            # Update position and animation
-            character.update(dt)
+            # Update position and animation by one fixed step
+            character.update(PHYSICS_STEP_MS)
             
             # Ground collision
             if character.y > SCREEN_HEIGHT - character.height:
@@ -192,33 +336,71 @@ class Game:
             enemy.current_state = WALKING  # Enemies always walking
             enemy.velocity_x = -2  # Simple left movement
 
-    def draw(self):
+    def draw(self, alpha=1.0):
         self.screen.fill((135, 206, 235))  # Sky blue background
         
         # Draw characters
-        self.mario.draw(self.screen)
-        self.luigi.draw(self.screen)
+        for player in self.players:
+            player.draw(self.screen, alpha)
         
         # Draw enemies
         for enemy in self.enemies:
-            enemy.draw(self.screen)
+            enemy.draw(self.screen, alpha)
         
         pygame.display.flip()
 
+    def step(self):
+        """Advance the simulation by one fixed physics step."""
+        for character in self.players + self.enemies:
+            character.previous_x = character.x
+            character.previous_y = character.y
+        self.handle_input()
+        self.update()
+
+    def run_headless(self, frames, script=HEADLESS_SCRIPT):
+        """Step input and physics frames times with no menu, drawing or frame cap; return simulated fps."""
+        self.input_source = ScriptedInput(script)
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.step()
+        return frames / (time.perf_counter() - start)
+
     def run(self):
         running = True
+        accumulator = 0.0
+        previous_time = time.perf_counter()
         while running:
+            now = time.perf_counter()
+            accumulator += min(now - previous_time, MAX_FRAME_TIME)
+            previous_time = now
+
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                     
-            self.handle_input()
-            self.update()
-            self.draw()
-            self.clock.tick(60)
+            # Catch up with as many physics steps as the elapsed time needs, then render once
+            while accumulator >= PHYSICS_STEP:
+                self.step()
+                accumulator -= PHYSICS_STEP
+            self.draw(accumulator / PHYSICS_STEP)
+            self.clock.tick(MAX_RENDER_FPS)
             
         pygame.quit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(description="Super Mario World with Sprites")
+    parser.add_argument("--headless", type=int, metavar="FRAMES",
+                        help="simulate FRAMES fixed steps without a window and report simulated fps")
+    parser.add_argument("--enemies", type=int, help="stress scenario: number of enemies")
+    parser.add_argument("--players", type=int, help="stress scenario: number of players, taking turns on Mario's and Luigi's keys")
+    parser.add_argument("--seed", type=int, help="stress scenario: random seed (default 0)")
+    args = parser.parse_args()
+    scenario = {name: value for name, value in vars(args).items() if name != "headless" and value is not None}
+    game = Game(headless=bool(args.headless))
+    if scenario:
+        game.load_scenario(**scenario)
+    if args.headless:
+        fps = game.run_headless(args.headless)
+        print(f"Simulated {args.headless} frames at {fps:.0f} fps")
+    else:
+        game.run()
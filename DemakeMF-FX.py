@@ -1,15 +1,175 @@
 import pygame
+import os
 import sys
+import time
+import random
+import argparse
 from enum import Enum
+from collections import OrderedDict
 import math
+import numpy as np
+
+FLOOR_TEXTURE_SIZE = 256  # Floor textures must be a power of two in each dimension
+FLOOR_TILE_SIZE = 32
+SKY_COLOR = (92, 148, 252)
+
+# Fixed-timestep loop: gameplay advances in steps of this length
+PHYSICS_STEP = 1 / 60
+MAX_FRAME_TIME = 0.25  # Longest frame fed to the accumulator, so a stall can't snowball
+MAX_RENDER_FPS = 0  # 0 renders gameplay as often as the machine allows
+MENU_FPS = 60
+TEXT_CACHE_SIZE = 64  # Rendered text surfaces kept by the shared text cache
+TITLE_FONT_SIZE = 72
+CREDITS_FONT_SIZE = 36
+
+# Menu background: a grid of 2x2 dots rotating about the screen center
+MENU_GRID_SPACING = 40
+MENU_GRID_COLOR = (0, 0, 100)
+MENU_ROTATION_SPEED = 0.5  # Degrees per menu frame
+MENU_BACKGROUND_RING = False  # Precompute the dots of a whole rotation cycle (about 4 MB) instead of rotating each frame
+
+# Stress scenarios (--enemies, --players, --seed)
+ENEMY_COLOR = (0, 0, 255)
 
-# Placeholder for FTRender class definition
 class FTRender:
-    def __init__(self, width, height):
+    """Software Mode 7 floor: every pixel below the horizon samples a tiled texture in one NumPy pass."""
+    def __init__(self, width, height, horizon=None, camera_height=48.0, focal_length=None):
         self.width = width
         self.height = height
-    def render(self):
-        pass
+        self.horizon = height // 3 if horizon is None else horizon
+        self.camera_height = camera_height
+        self.focal_length = width / 2 if focal_length is None else focal_length
+        self.texture = None
+        self.mapped_texture = None
+        self.mapped_masks = None
+
+        # Floor distance per scanline and its sideways spread per column never change
+        rows = np.arange(self.horizon + 1, height, dtype=np.float64) - self.horizon
+        self.row_distance = self.camera_height * self.focal_length / rows
+        columns = (np.arange(width, dtype=np.float64) - width / 2) / self.focal_length
+        self.column_spread = columns[:, None] * self.row_distance[None, :]
+
+        shape = self.column_spread.shape
+        self.u = np.empty(shape, dtype=np.float64)
+        self.v = np.empty(shape, dtype=np.float64)
+        self.iu = np.empty(shape, dtype=np.intp)
+        self.iv = np.empty(shape, dtype=np.intp)
+
+    def load_texture(self, texture):
+        width, height = texture.get_size()
+        if width & (width - 1) or height & (height - 1):
+            raise ValueError(f"Floor texture size must be a power of two, got {width}x{height}")
+        self.texture = pygame.surfarray.array3d(texture)
+        self.mapped_texture = None
+
+    def map_texture(self, surface, dtype):
+        """Convert the texture to the surface's pixel format once, so rendering is a single gather."""
+        masks = (surface.get_bitsize(), surface.get_masks())
+        if self.mapped_masks != masks:
+            self.mapped_texture = pygame.surfarray.map_array(surface, self.texture).astype(dtype).ravel()
+            self.mapped_masks = masks
+        return self.mapped_texture
+
+    def render(self, surface, camera, angle):
+        surface.fill(SKY_COLOR, (0, 0, self.width, self.horizon + 1))
+        if self.texture is None:
+            return
+        texture_width, texture_height = self.texture.shape[:2]
+
+        radians = math.radians(angle)
+        forward_x, forward_y = math.cos(radians), math.sin(radians)
+        right_x, right_y = -forward_y, forward_x
+        # Offset by a whole number of texture repeats to keep coordinates positive before truncating
+        wrap = texture_width * texture_height * 1024
+
+        np.multiply(self.column_spread, right_x, out=self.u)
+        self.u += camera.x + wrap + self.row_distance * forward_x
+        np.multiply(self.column_spread, right_y, out=self.v)
+        self.v += camera.y + wrap + self.row_distance * forward_y
+
+        np.copyto(self.iu, self.u, casting='unsafe')
+        self.iu &= texture_width - 1
+        self.iu *= texture_height
+        np.copyto(self.iv, self.v, casting='unsafe')
+        self.iv &= texture_height - 1
+        self.iu += self.iv
+
+        pixels = pygame.surfarray.pixels2d(surface)
+        texture = self.map_texture(surface, pixels.dtype)
+        np.take(texture, self.iu, out=pixels[:, self.horizon + 1:], mode='wrap')
+        del pixels
+
+def make_floor_texture():
+    """Checkerboard floor texture for the Mode 7 renderer."""
+    texture = pygame.Surface((FLOOR_TEXTURE_SIZE, FLOOR_TEXTURE_SIZE))
+    for x in range(0, FLOOR_TEXTURE_SIZE, FLOOR_TILE_SIZE):
+        for y in range(0, FLOOR_TEXTURE_SIZE, FLOOR_TILE_SIZE):
+            light = (x + y) // FLOOR_TILE_SIZE % 2 == 0
+            texture.fill((0, 168, 0) if light else (0, 120, 0), (x, y, FLOOR_TILE_SIZE, FLOOR_TILE_SIZE))
+    return texture
+
+class TextCache:
+    """Shared text renderer: one Font per size and an LRU of rendered surfaces keyed by (text, size, color)."""
+    def __init__(self, max_surfaces=TEXT_CACHE_SIZE):
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.max_surfaces = max_surfaces
+
+    def get_font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = self.get_font(size).render(text, True, color)
+            if len(self.surfaces) > self.max_surfaces:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+TEXT_CACHE = TextCache()
+
+class GridBackground:
+    """Rotating dot grid: all dots are rotated at once with NumPy and written through a pixel array."""
+    def __init__(self, width, height, spacing=MENU_GRID_SPACING, ring=MENU_BACKGROUND_RING):
+        self.width = width
+        self.height = height
+        x, y = np.meshgrid(np.arange(-spacing, width + spacing, spacing),
+                           np.arange(-spacing, height + spacing, spacing), indexing='ij')
+        self.offset_x = x.ravel() - width / 2
+        self.offset_y = y.ravel() - height / 2
+
+        # The animation repeats every full turn, so one cycle of dot positions covers it
+        self.ring = None
+        if ring:
+            self.ring = [self.dots(step * MENU_ROTATION_SPEED) for step in range(round(360 / MENU_ROTATION_SPEED))]
+
+    def dots(self, angle):
+        """Pixel coordinates of every on-screen dot pixel at angle degrees."""
+        angle_rad = math.radians(angle)
+        cos, sin = math.cos(angle_rad), math.sin(angle_rad)
+        # Truncated toward zero, as pygame.draw.rect does with float positions
+        x = (self.offset_x * cos - self.offset_y * sin + self.width / 2).astype(np.int16)
+        y = (self.offset_x * sin + self.offset_y * cos + self.height / 2).astype(np.int16)
+        x = np.concatenate((x, x + 1, x, x + 1))
+        y = np.concatenate((y, y, y + 1, y + 1))
+        visible = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        return x[visible], y[visible]
+
+    def draw(self, surface, angle):
+        step = angle / MENU_ROTATION_SPEED
+        if self.ring is not None and step == int(step):
+            x, y = self.ring[int(step) % len(self.ring)]
+        else:
+            x, y = self.dots(angle)
+        pixels = pygame.surfarray.pixels2d(surface)
+        pixels[x, y] = surface.map_rgb(MENU_GRID_COLOR)
+        del pixels  # Unlock the surface for blitting
 
 class MenuState(Enum):
     MAIN = "main"
@@ -21,14 +181,14 @@ class MenuItem:
         self.text = text
         self.position = position
         self.action = action
-        self.font = pygame.font.Font(None, font_size)
+        self.font_size = font_size
         self.is_selected = False
         self.original_y = position[1]
         self.hover_offset = 0
         
     def draw(self, surface):
         color = (255, 255, 0) if self.is_selected else (255, 255, 255)
-        text_surface = self.font.render(self.text, True, color)
+        text_surface = TEXT_CACHE.render(self.text, self.font_size, color)
         pos = (self.position[0], self.position[1] + self.hover_offset)
         surface.blit(text_surface, pos)
         
@@ -56,9 +216,6 @@ class MenuSystem:
                      lambda: sys.exit())
         ]
         
-        # Title font
-        self.title_font = pygame.font.Font(None, 72)
-        
         # Credits text
         self.credits_text = [
             "Super Mario FX Beta",
@@ -72,27 +229,18 @@ class MenuSystem:
             "",
             "Press ESC to return"
         ]
-        self.credits_font = pygame.font.Font(None, 36)
         
         # Background effect
         self.bg_angle = 0
-        self.bg_tiles = self.create_background_tiles()
+        self.bg_grid = GridBackground(screen_width, screen_height)
 
         # State tracking for key presses
         self.prev_up = False
         self.prev_down = False
         self.prev_enter = False
         
-    def create_background_tiles(self):
-        tile_size = 40
-        tiles = []
-        for x in range(-tile_size, self.screen_width + tile_size, tile_size):
-            for y in range(-tile_size, self.screen_height + tile_size, tile_size):
-                tiles.append((x, y))
-        return tiles
-        
     def update(self):
-        self.bg_angle += 0.5
+        self.bg_angle += MENU_ROTATION_SPEED
         
         if self.state == MenuState.MAIN:
             keys = pygame.key.get_pressed()
@@ -124,15 +272,7 @@ class MenuSystem:
                 
     def draw_background(self, screen):
         # Create rotating grid effect
-        angle_rad = math.radians(self.bg_angle)
-        for x, y in self.bg_tiles:
-            cx, cy = self.screen_width/2, self.screen_height/2
-            px = x - cx
-            py = y - cy
-            rot_x = px * math.cos(angle_rad) - py * math.sin(angle_rad) + cx
-            rot_y = px * math.sin(angle_rad) + py * math.cos(angle_rad) + cy
-            
-            pygame.draw.rect(screen, (0, 0, 100), (rot_x, rot_y, 2, 2))
+        self.bg_grid.draw(screen, self.bg_angle)
     
     def draw(self, screen):
         screen.fill((0, 0, 40))
@@ -140,7 +280,7 @@ class MenuSystem:
         
         if self.state == MenuState.MAIN:
             # Draw title
-            title_text = self.title_font.render("Super Mario FX Beta", True, (255, 255, 255))
+            title_text = TEXT_CACHE.render("Super Mario FX Beta", TITLE_FONT_SIZE, (255, 255, 255))
             screen.blit(title_text, (self.screen_width//2 - title_text.get_width()//2, 100))
             
             # Draw menu items
@@ -149,23 +289,59 @@ class MenuSystem:
                 
         elif self.state == MenuState.CREDITS:
             for i, line in enumerate(self.credits_text):
-                text_surface = self.credits_font.render(line, True, (255, 255, 255))
+                text_surface = TEXT_CACHE.render(line, CREDITS_FONT_SIZE, (255, 255, 255))
                 y_pos = 100 + i * 40
                 screen.blit(text_surface, 
                            (self.screen_width//2 - text_surface.get_width()//2, y_pos))
 
 class GameObject:
-    def __init__(self, x, y, width, height):
+    def __init__(self, x, y, width, height, color=(255, 0, 0)):
         self.x = x
         self.y = y
+        self.previous_x = x
+        self.previous_y = y
         self.width = width
         self.height = height
+        self.color = color
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, (255, 0, 0), (self.x, self.y, self.width, self.height))
+    def draw(self, screen, alpha=1.0):
+        x = self.previous_x + (self.x - self.previous_x) * alpha
+        y = self.previous_y + (self.y - self.previous_y) * alpha
+        pygame.draw.rect(screen, self.color, (x, y, self.width, self.height))
+
+class ScriptedInput:
+    """Replays a looping script of (frames, keys) steps in place of pygame.key for headless runs."""
+    def __init__(self, script):
+        self.frames = [frozenset(keys) for count, keys in script for _ in range(count)]
+        self.frame = 0
+
+    def get_pressed(self):
+        keys = self.frames[self.frame % len(self.frames)]
+        self.frame += 1
+        return ScriptedKeys(keys)
+
+class ScriptedKeys:
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+# Default headless input: both players run right, jump, run back left, then stand still
+HEADLESS_SCRIPT = [
+    (60, [pygame.K_RIGHT, pygame.K_d]),
+    (10, [pygame.K_RIGHT, pygame.K_d, pygame.K_SPACE, pygame.K_w]),
+    (60, [pygame.K_LEFT, pygame.K_a]),
+    (30, []),
+]
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False):
+        # Headless runs use SDL's dummy video driver, so no window is ever shown
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        self.input_source = pygame.key
         pygame.init()
         self.screen = pygame.display.set_mode((800, 600))
         pygame.display.set_caption("Super Mario FX Beta")
@@ -188,12 +364,20 @@ class Game:
         # Load textures and create render objects
         self.init_textures()
 
+    def load_scenario(self, enemies=0, players=2, seed=0):
+        """Replace the game objects with a seeded stress scenario; the first player is Mario."""
+        random.seed(seed)
+        players = [GameObject((100 + 60 * i) % 800, 100, 24, 24) for i in range(players)]
+        enemies = [GameObject(random.randrange(800 - 24), random.randrange(600 - 24), 24, 24, ENEMY_COLOR)
+                   for _ in range(enemies)]
+        self.mario = players[0] if players else GameObject(100, 100, 24, 24)
+        self.game_objects = players + enemies
+
     def init_textures(self):
-        # Placeholder for texture loading logic
-        pass
+        self.renderer.load_texture(make_floor_texture())
         
     def handle_input(self):
-        keys = pygame.key.get_pressed()
+        keys = self.input_source.get_pressed()
         # Move Mario around using arrow keys
         if keys[pygame.K_LEFT]:
             self.mario.x -= 5
@@ -208,15 +392,37 @@ class Game:
         # Update game logic here (if any)
         pass
 
-    def render(self):
-        # Render the gameplay screen
-        self.screen.fill((0, 0, 0))
+    def render(self, alpha=1.0):
+        # Render the gameplay screen over the Mode 7 floor
+        self.renderer.render(self.screen, self.camera, self.camera_angle)
         for obj in self.game_objects:
-            obj.draw(self.screen)
+            obj.draw(self.screen, alpha)
         pygame.display.flip()
 
+    def step(self):
+        """Advance the gameplay by one fixed step."""
+        for obj in self.game_objects:
+            obj.previous_x = obj.x
+            obj.previous_y = obj.y
+        self.handle_input()
+        self.update()
+
+    def run_headless(self, frames, script=HEADLESS_SCRIPT):
+        """Step input and physics frames times with no menu, drawing or frame cap; return simulated fps."""
+        self.input_source = ScriptedInput(script)
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.step()
+        return frames / (time.perf_counter() - start)
+
     def run(self):
+        accumulator = 0.0
+        previous_time = time.perf_counter()
         while self.running:
+            now = time.perf_counter()
+            accumulator += min(now - previous_time, MAX_FRAME_TIME)
+            previous_time = now
+
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
@@ -227,18 +433,36 @@ class Game:
 
             # Update and render based on current state
             if self.menu.state == MenuState.PLAYING:
-                self.handle_input()
-                self.update()
-                self.render()
+                # Catch up with as many fixed steps as the elapsed time needs, then render once
+                while accumulator >= PHYSICS_STEP:
+                    self.step()
+                    accumulator -= PHYSICS_STEP
+                self.render(accumulator / PHYSICS_STEP)
+                self.clock.tick(MAX_RENDER_FPS)
             else:
+                # Menu animations are per frame, so the menu keeps a fixed frame rate
+                accumulator = 0.0
                 self.menu.update()
                 self.menu.draw(self.screen)
                 pygame.display.flip()
-                
-            self.clock.tick(60)
+                self.clock.tick(MENU_FPS)
 
         pygame.quit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(description="Super Mario FX Beta")
+    parser.add_argument("--headless", type=int, metavar="FRAMES",
+                        help="simulate FRAMES fixed steps without a window and report simulated fps")
+    parser.add_argument("--enemies", type=int, help="stress scenario: number of enemies")
+    parser.add_argument("--players", type=int, help="stress scenario: number of players; only the first is controlled")
+    parser.add_argument("--seed", type=int, help="stress scenario: random seed (default 0)")
+    args = parser.parse_args()
+    scenario = {name: value for name, value in vars(args).items() if name != "headless" and value is not None}
+    game = Game(headless=bool(args.headless))
+    if scenario:
+        game.load_scenario(**scenario)
+    if args.headless:
+        fps = game.run_headless(args.headless)
+        print(f"Simulated {args.headless} frames at {fps:.0f} fps")
+    else:
+        game.run()
@@ -1,24 +1,259 @@
 import os
 import sys
+import math
 import random
 import inspect
+import numpy as np
 from datetime import datetime
+from itertools import product
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from ursina import *
 from ursina.prefabs.first_person_controller import FirstPersonController
+from panda3d.core import CollisionBox, CollisionNode, NodePath
+
+class EnemySwarm:
+    """Enemy positions and directions kept in NumPy arrays, so all enemies move in one vectorized step."""
+    def __init__(self, enemies, ground_scale):
+        self.enemies = enemies
+        self.positions = np.array([enemy.position for enemy in enemies], dtype=np.float32).reshape(-1, 3)
+        self.directions = np.array([enemy.direction for enemy in enemies], dtype=np.float32).reshape(-1, 3)
+        self.speeds = np.array([enemy.speed for enemy in enemies], dtype=np.float32)
+        self.bounds = np.array(ground_scale, dtype=np.float32) / 2  # The ground plane is centered on the origin
+
+    def update(self, dt, visible=None):
+        """Move every enemy; only the Entities flagged in visible (all by default) are repositioned."""
+        self.positions += self.directions * (self.speeds * dt)[:, None]
+
+        # Bounce off the edges of the ground
+        outside = np.abs(self.positions) > self.bounds
+        outside[:, 1] = False
+        self.directions[outside] *= -1
+        np.clip(self.positions, -self.bounds, self.bounds, out=self.positions, where=outside)
+
+        positions = self.positions.tolist()
+        indices = range(len(self.enemies)) if visible is None else np.flatnonzero(visible).tolist()
+        for index in indices:
+            self.enemies[index].setPos(*positions[index])
+
+
+class DistanceLOD:
+    """Detail tiers of entities by distance to the camera, applied only to the entities whose tier changed."""
+    def __init__(self, entities, radii, apply):
+        self.entities = entities
+        self.radii_sq = np.square(np.asarray(radii, dtype=np.float32))
+        self.apply = apply  # apply(entity, tier): tier 0 is full detail, one more for each radius passed
+        self.tiers = np.zeros(len(entities), dtype=np.int8)  # Entities start at full detail, as pools spawn them
+        self.active = np.ones(len(entities), dtype=bool)
+
+    def update(self, positions, camera_position):
+        distance_sq = np.square(positions - camera_position).sum(axis=1)
+        tiers = np.searchsorted(self.radii_sq, distance_sq).astype(np.int8)
+        changed = np.flatnonzero((tiers != self.tiers) & self.active)
+        self.tiers[changed] = tiers[changed]
+        for index in changed.tolist():
+            self.apply(self.entities[index], int(tiers[index]))
+
+    def remove(self, index):
+        """Stop managing an entity, leaving it as it is."""
+        self.active[index] = False
+
+
+# Unit cube faces as (outward normal, u axis, v axis), wound so they are drawn from outside
+CUBE_FACES = (
+    ((0, 0, -1), (1, 0, 0), (0, 1, 0)),
+    ((0, 0, 1), (-1, 0, 0), (0, 1, 0)),
+    ((1, 0, 0), (0, 0, 1), (0, 1, 0)),
+    ((-1, 0, 0), (0, 0, -1), (0, 1, 0)),
+    ((0, 1, 0), (1, 0, 0), (0, 0, 1)),
+    ((0, -1, 0), (1, 0, 0), (0, 0, -1)),
+)
+
+
+def cube_geometry():
+    """(vertices, uvs, normals, triangles) of a unit cube centered on the origin, four vertices per face."""
+    faces = np.array(CUBE_FACES, dtype=np.float32)
+    normal, u, v = faces[:, 0, None], faces[:, 1, None], faces[:, 2, None]
+    corners = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)], dtype=np.float32)
+    vertices = (normal + corners[:, 0, None] * u + corners[:, 1, None] * v) / 2
+    uvs = np.tile((corners + 1) / 2, (len(faces), 1))
+    normals = np.repeat(faces[:, 0], len(corners), axis=0)
+    triangles = (np.arange(len(faces))[:, None] * len(corners) + [0, 1, 2, 0, 2, 3]).ravel()
+    return vertices.reshape(-1, 3), uvs, normals, triangles
+
+
+CUBE_VERTICES, CUBE_UVS, CUBE_NORMALS, CUBE_TRIANGLES = cube_geometry()
+
+
+class BoxesCollider(Collider):
+    """Many axis-aligned boxes as solids of one collision node, instead of one collider Entity per box."""
+    def __init__(self, entity):
+        NodePath.__init__(self, 'boxes_collider')
+        self.collision_node = CollisionNode('CollisionNode')
+        self.node_path = entity.attachNewNode(self.collision_node)
+        self.visible = False
+
+    def set_boxes(self, positions, scales):
+        self.collision_node.clearSolids()
+        for position, scale in zip(positions.tolist(), np.maximum(scales / 2, 0.001).tolist()):
+            self.collision_node.addSolid(CollisionBox(Vec3(*position), *scale))
+
+
+def box_mesh(positions, scales):
+    """One Mesh of axis-aligned boxes; it touches no scene nodes, so it can be built off the main thread."""
+    count = len(positions)
+    vertices = CUBE_VERTICES * scales[:, None] + positions[:, None]
+    triangles = CUBE_TRIANGLES + (np.arange(count) * len(CUBE_VERTICES))[:, None]
+    return Mesh(
+        vertices=vertices.reshape(-1, 3).tolist(), triangles=triangles.ravel().tolist(),
+        uvs=np.tile(CUBE_UVS, (count, 1)).tolist(), normals=np.tile(CUBE_NORMALS, (count, 1)).tolist()
+    )
+
+
+def box_arrays(positions, scales):
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    return positions, np.broadcast_to(np.asarray(scales, dtype=np.float32), positions.shape)
+
+
+class StaticBatch(Entity):
+    """Static boxes sharing one material, built as a single mesh so they cost one draw call."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.collider = BoxesCollider(self)
+
+    def set_boxes(self, positions, scales, mesh=None):
+        """Replace the batch's boxes, using mesh if it was already built; the Entity and its collision node are kept."""
+        positions, scales = box_arrays(positions, scales)
+        self.collider.set_boxes(positions, scales)
+        if not len(positions):
+            self.model = None
+        else:
+            self.model = mesh if mesh is not None else box_mesh(positions, scales)
+
+
+class EntityPool:
+    """Entities of one kind parked between levels, so a level load repositions them instead of creating new ones."""
+    def __init__(self, create, on_spawn=None, on_release=None):
+        self.create = create  # Returns a new, disabled Entity
+        self.on_spawn = on_spawn  # Called with each Entity as it is enabled, to restart per-entity work
+        self.on_release = on_release  # Called with each Entity as it is parked, to stop that work
+        self.active = []
+        self.parked = []
+
+    def spawn(self, positions):
+        """Enable one Entity per position, creating only the ones the pool is short of."""
+        while len(self.parked) < len(positions):
+            self.parked.append(self.create())
+        entities = self.parked[len(self.parked) - len(positions):]
+        del self.parked[len(self.parked) - len(positions):]
+        for entity, position in zip(entities, positions):
+            entity.position = position
+            entity.enabled = True
+            if self.on_spawn:
+                self.on_spawn(entity)
+        self.active.extend(entities)
+        return entities
+
+    def release(self):
+        """Disable and park every spawned Entity."""
+        for entity in self.active:
+            entity.enabled = False
+            if self.on_release:
+                self.on_release(entity)
+        self.parked.extend(self.active)
+        self.active = []
+
+
+class CoinHash:
+    """Coins bucketed by 3D grid cell, so a pickup only tests the coins in the cells around the player."""
+    CELL_SIZE = 2
+
+    def __init__(self, positions):
+        self.cells = defaultdict(list)
+        for index, (x, y, z) in enumerate(positions):
+            self.cells[self.cell(x, y, z)].append((index, x, y, z))
+
+    def cell(self, x, y, z):
+        size = self.CELL_SIZE
+        return math.floor(x / size), math.floor(y / size), math.floor(z / size)
+
+    def collect(self, position, radius):
+        """Remove the coins within radius of position and return their indices."""
+        px, py, pz = position
+        cx, cy, cz = self.cell(px, py, pz)
+        reach = math.ceil(radius / self.CELL_SIZE)
+        span = range(-reach, reach + 1)
+        collected = []
+        for dx, dy, dz in product(span, span, span):
+            key = (cx + dx, cy + dy, cz + dz)
+            bucket = self.cells.get(key)
+            if not bucket:
+                continue
+            kept = []
+            for entry in bucket:
+                _, x, y, z = entry
+                if (x - px) ** 2 + (y - py) ** 2 + (z - pz) ** 2 <= radius * radius:
+                    collected.append(entry[0])
+                else:
+                    kept.append(entry)
+            if kept:
+                self.cells[key] = kept
+            else:
+                del self.cells[key]
+        return collected
+
+
+class Observed:
+    """Attribute that calls its owner's state_changed(name) when its value changes, so readers need not poll it."""
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.attribute = '_' + name
+
+    def __get__(self, instance, owner=None):
+        return self if instance is None else getattr(instance, self.attribute)
+
+    def __set__(self, instance, value):
+        if getattr(instance, self.attribute, None) != value:
+            setattr(instance, self.attribute, value)
+            instance.state_changed(self.name)
+
+
+class Player(FirstPersonController):
+    health = Observed()
+
+    def __init__(self, state_changed, health=3, **kwargs):
+        super().__init__(**kwargs)
+        self.state_changed = state_changed
+        self.health = health
+
 
 class Mario3DEngine(Ursina):
+    COIN_PICKUP_RADIUS = 1.5
+    COIN_DETAIL_RADIUS = 25  # Farther coins use a low-poly model and stop spinning
+    COIN_VISIBLE_RADIUS = 60
+    COIN_MODELS = ('sphere', 'diamond')  # Model per detail tier; coins past the last tier are hidden
+    ENEMY_VISIBLE_RADIUS = 60
+    PLATFORM_SCALE = (4, 0.5, 4)
+    score = Observed()
+
     def __init__(self):
         super().__init__()  # Initialize the Ursina engine first
+        self.hud_changes = set()  # Names of the observed values changed since the HUD was last laid out
         
         # Initialize game components
         self.setup_window()
         self.create_player()
         self.create_ui()
         self.setup_environment()
+        self.create_level_pools()
 
         # Define levels and load the first level
         self.levels = self.define_levels()
         self.current_level = 0
+        self.preloader = ThreadPoolExecutor(max_workers=1)
+        self.preload = None  # (level index, future layout) of the level being prepared next
+        self.preload_warmed = False
+        self.switch_ms = None
         
         if self.levels:  # Check if levels are defined
             self.load_level(self.current_level)
@@ -26,6 +261,9 @@ class Mario3DEngine(Ursina):
             print("Error: No levels defined. Exiting game.")
             application.quit()  # Exit the application if levels are missing
 
+        # Ursina only calls update() on entities, so an entity drives the engine's update each frame
+        self.updater = Entity(update=self.update)
+
 
     def setup_window(self):
         window.title = 'Super Mario 3D'
@@ -35,11 +273,10 @@ class Mario3DEngine(Ursina):
         window.fps_counter.enabled = True
 
     def create_player(self):
-        self.player = FirstPersonController(
-            model='cube', color=color.red, scale=(1, 2, 1), position=(0, 2, 0),
+        self.player = Player(
+            self.state_changed, model='cube', color=color.red, scale=(1, 2, 1), position=(0, 2, 0),
             speed=10, jump_height=4
         )
-        self.player.health = 3
         self.score = 0
 
     def create_ui(self):
@@ -47,11 +284,24 @@ class Mario3DEngine(Ursina):
         self.score_text = Text(text=f'Score: {self.score}', position=(-0.85, 0.4))
         self.status_message = Text(text='', position=(0, 0.3), visible=False)
         self.flash_effect = Entity(model='quad', scale=(2, 1), color=color.rgba(1, 1, 1, 0), z=-0.1)
+        self.hud_changes.clear()
 
     def setup_environment(self):
         self.sky = Sky()  # Ensuring `sky` is created before accessing it
         self.directional_light = DirectionalLight(y=-1, z=-1)
 
+    def create_level_pools(self):
+        # Level geometry is kept across load_level calls; each level only lays it out again
+        self.ground = Entity(model='plane', texture_scale=(50, 50), collider='box')
+        self.platform_batch = StaticBatch(color=color.light_gray, texture='brick')
+        # Ursina runs sequences of disabled Entities too, so parked coins stop spinning. Spawned coins
+        # are reset to full detail, the tier DistanceLOD starts them in, whatever tier they were parked at
+        self.coin_pool = EntityPool(
+            self.create_coin, on_spawn=lambda coin: self.set_coin_detail(coin, 0),
+            on_release=lambda coin: coin.spin.pause()
+        )
+        self.enemy_pool = EntityPool(self.create_enemy)
+
     def define_levels(self):
         return [
             {'theme': 'grass', 'color': color.green, 'enemies': 5, 'coins': 10, 'ground_scale': (100, 1, 100),
@@ -63,24 +313,78 @@ class Mario3DEngine(Ursina):
         ]
 
     def load_level(self, level_idx):
+        start = time.perf_counter()
         level = self.levels[level_idx]
+        preloaded = self.preload is not None and self.preload[0] == level_idx
+        # A preload that has not finished yet is waited for rather than started over
+        layout = self.preload[1].result() if preloaded else self.generate_layout(level)
         self.clear_scene()
         self.show_message(f'Level {level_idx + 1}: {level["theme"].title()}', 2)
-        self.create_level_elements(level)
+        self.create_level_elements(level, layout)
+        self.current_level = level_idx
+        self.switch_ms = (time.perf_counter() - start) * 1000
+        print(f"Level {level_idx + 1} switch: {self.switch_ms:.1f} ms "
+              f"({'preloaded' if preloaded else 'generated on switch'})")
+        self.preload_level((level_idx + 1) % len(self.levels))
+
+    def preload_level(self, level_idx):
+        self.preload = (level_idx, self.preloader.submit(self.generate_layout, self.levels[level_idx]))
+        self.preload_warmed = False
+
+    def warm_preload(self):
+        # Queue the prepared texture and platform mesh for upload; this needs the main thread
+        layout = self.preload[1].result()
+        gsg = self.win.getGsg() if self.win else None
+        if gsg:
+            if layout['texture']:
+                layout['texture']._texture.prepare(gsg.getPreparedObjects())
+            if layout['platform_mesh'] is not None:
+                layout['platform_mesh'].prepareScene(gsg)
+        self.preload_warmed = True
+
+    def generate_layout(self, level):
+        """Random placements, texture and platform mesh of a level; it touches no scene nodes, so it runs in the preloader."""
+        platforms, scales = box_arrays([
+            (random.uniform(-40, 40), random.uniform(3, 15), random.uniform(-40, 40))
+            for _ in range(level['platforms'])
+        ], self.PLATFORM_SCALE)
+        return {
+            'texture': load_texture(self.get_texture(level['theme'])),
+            'platforms': platforms,
+            'platform_mesh': box_mesh(platforms, scales) if len(platforms) else None,
+            'coins': [
+                (random.uniform(-45, 45), random.uniform(1, 10), random.uniform(-45, 45))
+                for _ in range(level['coins'])
+            ],
+            'enemies': [(random.uniform(-45, 45), 1, random.uniform(-45, 45)) for _ in range(level['enemies'])],
+            'enemy_speeds': [random.uniform(2, 4) for _ in range(level['enemies'])],
+            'enemy_directions': [
+                Vec3(random.uniform(-1, 1), 0, random.uniform(-1, 1)).normalized()
+                for _ in range(level['enemies'])
+            ],
+        }
 
     def clear_scene(self):
-        for entity in scene.entities:
-            if entity not in [self.player, self.sky, self.directional_light, self.flash_effect, self.status_message]:
-                destroy(entity)
-
-    def create_level_elements(self, level):
-        self.ground = Entity(
-            model='plane', scale=level['ground_scale'], color=level['color'],
-            texture=self.get_texture(level['theme']), texture_scale=(50, 50), collider='box'
+        # Park what the previous level used; the player, HUD and editor UI persist
+        self.coin_pool.release()
+        self.enemy_pool.release()
+
+    def create_level_elements(self, level, layout=None):
+        layout = layout or self.generate_layout(level)
+        self.ground.scale = level['ground_scale']
+        self.ground.color = level['color']
+        self.ground.texture = layout['texture']
+        self.create_platforms(layout['platforms'], layout['platform_mesh'])
+        self.create_coins(layout['coins'])
+        self.create_enemies(layout['enemies'], layout['enemy_speeds'], layout['enemy_directions'])
+        self.enemy_swarm = EnemySwarm(self.enemies, level['ground_scale'])
+        self.enemy_lod = DistanceLOD(self.enemies, [self.ENEMY_VISIBLE_RADIUS], self.set_enemy_detail)
+        self.coin_positions = np.array(layout['coins'], dtype=np.float32).reshape(-1, 3)
+        self.coin_lod = DistanceLOD(
+            self.coins, [self.COIN_DETAIL_RADIUS, self.COIN_VISIBLE_RADIUS], self.set_coin_detail
         )
-        self.create_platforms(level['platforms'])
-        self.create_coins(level['coins'])
-        self.create_enemies(level['enemies'])
+        # Coins are picked up through the hash, so they have no colliders for the engine to test
+        self.coin_hash = CoinHash(layout['coins'])
 
     @staticmethod
     def get_texture(theme):
@@ -90,40 +394,45 @@ class Mario3DEngine(Ursina):
             'snow': 'snow'
         }.get(theme, 'grass')
 
-    def create_platforms(self, count):
-        self.platforms = [
-            Entity(
-                model='cube', color=color.light_gray,
-                position=(random.uniform(-40, 40), random.uniform(3, 15), random.uniform(-40, 40)),
-                scale=(4, 0.5, 4), texture='brick', collider='box'
-            )
-            for _ in range(count)
-        ]
+    def create_platforms(self, positions, mesh=None):
+        # Every platform shares one material, so they all go into a single batch
+        self.platform_batch.set_boxes(positions, self.PLATFORM_SCALE, mesh)
+        self.platforms = [self.platform_batch]
 
-    def create_coins(self, count):
-        self.coins = [
-            Entity(
-                model='sphere', scale=0.5, color=color.gold,
-                position=(random.uniform(-45, 45), random.uniform(1, 10), random.uniform(-45, 45)),
-                collider='sphere'
-            )
-            for _ in range(count)
-        ]
-        for coin in self.coins:
-            coin.animate_rotation_y(360, duration=1, loop=True)
-
-    def create_enemies(self, count):
-        self.enemies = [
-            Entity(
-                model='cube', scale=(1, 1, 1), color=color.red,
-                position=(random.uniform(-45, 45), 1, random.uniform(-45, 45)),
-                collider='box'
-            )
-            for _ in range(count)
-        ]
-        for enemy in self.enemies:
-            enemy.speed = random.uniform(2, 4)
-            enemy.direction = Vec3(random.uniform(-1, 1), 0, random.uniform(-1, 1)).normalized()
+    @staticmethod
+    def create_coin():
+        coin = Entity(model='sphere', scale=0.5, color=color.gold, enabled=False)
+        coin.model_tier = 0
+        coin.spin = coin.animate_rotation_y(360, duration=1, loop=True)
+        coin.spin.pause()  # New coins start parked
+        return coin
+
+    def set_coin_detail(self, coin, tier):
+        coin.enabled = tier < len(self.COIN_MODELS)
+        if coin.enabled and coin.model_tier != tier:
+            coin.model = self.COIN_MODELS[tier]
+            coin.model_tier = tier
+        if tier == 0:
+            coin.spin.resume()
+        else:
+            coin.spin.pause()
+
+    def create_coins(self, positions):
+        self.coins = self.coin_pool.spawn(positions)
+
+    @staticmethod
+    def create_enemy():
+        return Entity(model='cube', scale=(1, 1, 1), color=color.red, collider='box', enabled=False)
+
+    @staticmethod
+    def set_enemy_detail(enemy, tier):
+        enemy.enabled = tier == 0
+
+    def create_enemies(self, positions, speeds, directions):
+        self.enemies = self.enemy_pool.spawn(positions)
+        for enemy, speed, direction in zip(self.enemies, speeds, directions):
+            enemy.speed = speed
+            enemy.direction = direction
 
     def show_message(self, text, duration=1):
         self.status_message.text = text
@@ -134,13 +443,40 @@ class Mario3DEngine(Ursina):
         self.status_message.visible = False
 
     def update(self):
-        self.update_ui()
+        # Far enemies keep moving in the swarm, but only the visible ones are repositioned
+        camera_position = np.array(camera.world_position, dtype=np.float32)
+        self.enemy_lod.update(self.enemy_swarm.positions, camera_position)
+        self.enemy_swarm.update(time.dt, self.enemy_lod.tiers == 0)
+        self.coin_lod.update(self.coin_positions, camera_position)
+        self.collect_coins()
+        if self.hud_changes:
+            self.update_ui()
+        if self.preload and not self.preload_warmed and self.preload[1].done():
+            self.warm_preload()
+
+    def collect_coins(self):
+        # The player's position is at its feet; test from the middle of its body
+        center = self.player.world_position + Vec3(0, self.player.scale_y / 2, 0)
+        collected = self.coin_hash.collect(center, self.COIN_PICKUP_RADIUS)
+        for index in collected:
+            self.coins[index].disable()
+            self.coins[index].spin.pause()
+            self.coin_lod.remove(index)
+        self.score += len(collected)
+        if collected and not self.coin_hash.cells:
+            # Every coin is collected: move on to the next level, which has been preloaded meanwhile
+            self.load_level((self.current_level + 1) % len(self.levels))
+
+    def state_changed(self, name):
+        self.hud_changes.add(name)
 
     def update_ui(self):
-        if self.health_text.text != f'Lives: {self.player.health}':
+        # Lay out each changed text once, however many times its value changed this frame
+        if 'health' in self.hud_changes:
             self.health_text.text = f'Lives: {self.player.health}'
-        if self.score_text.text != f'Score: {self.score}':
+        if 'score' in self.hud_changes:
             self.score_text.text = f'Score: {self.score}'
+        self.hud_changes.clear()
 
     def patch_program(self):
         """
@@ -1,4 +1,7 @@
 import pygame
+import os
+import time
+import argparse
 import random
 
 # Constants
@@ -21,6 +24,18 @@ PLAYER_SPEED = 5
 JUMP_FORCE = -15
 GRAVITY = 0.8
 
+# Keys (left, right, jump) and colours per player; extra players take turns reusing them
+PLAYER_CONTROLS = [
+    (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE),  # Mario
+    (pygame.K_a, pygame.K_d, pygame.K_w),  # Luigi
+]
+PLAYER_COLORS = [RED, GREEN]
+
+# Fixed-timestep loop: physics constants are per step, so physics always runs at this rate
+PHYSICS_STEP = 1 / 60
+MAX_FRAME_TIME = 0.25  # Longest frame fed to the accumulator, so a stall can't snowball
+MAX_RENDER_FPS = 0  # 0 renders as often as the machine allows
+
 class Player(pygame.sprite.Sprite):
     def __init__(self, x, y, color):
         super().__init__()
@@ -29,6 +44,7 @@ class Player(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
+        self.previous_position = self.rect.topleft
         self.velocity_x = 0
         self.velocity_y = 0
         self.on_ground = False
@@ -56,6 +72,7 @@ class Enemy(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
+        self.previous_position = self.rect.topleft
         self.velocity_x = random.choice([-2, 2])
 
     def update(self):
@@ -90,25 +107,75 @@ def draw_castle(screen):
     door_y = castle_y + castle_height - door_height
     pygame.draw.rect(screen, BLACK, (door_x, door_y, door_width, door_height))
 
+def draw_interpolated(surface, sprites, alpha):
+    """Blit sprites between their previous and current physics positions."""
+    for sprite in sprites:
+        previous_x, previous_y = sprite.previous_position
+        x = previous_x + (sprite.rect.x - previous_x) * alpha
+        y = previous_y + (sprite.rect.y - previous_y) * alpha
+        surface.blit(sprite.image, (round(x), round(y)))
+
+class ScriptedInput:
+    """Replays a looping script of (frames, keys) steps in place of pygame.key for headless runs."""
+    def __init__(self, script):
+        self.frames = [frozenset(keys) for count, keys in script for _ in range(count)]
+        self.frame = 0
+
+    def get_pressed(self):
+        keys = self.frames[self.frame % len(self.frames)]
+        self.frame += 1
+        return ScriptedKeys(keys)
+
+class ScriptedKeys:
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+# Default headless input: both players run right, jump, run back left, then stand still
+HEADLESS_SCRIPT = [
+    (60, [pygame.K_RIGHT, pygame.K_d]),
+    (10, [pygame.K_RIGHT, pygame.K_d, pygame.K_SPACE, pygame.K_w]),
+    (60, [pygame.K_LEFT, pygame.K_a]),
+    (30, []),
+]
+
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False):
+        # Headless runs use SDL's dummy video driver, so no window is ever shown
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        self.input_source = pygame.key
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Super Mario FX")
         self.clock = pygame.time.Clock()
         self.running = True
 
-        self.mario = Player(100, SCREEN_HEIGHT - TILE_SIZE * 2, RED)
-        self.luigi = Player(200, SCREEN_HEIGHT - TILE_SIZE * 2, GREEN)
+        self.players = [
+            Player(100, SCREEN_HEIGHT - TILE_SIZE * 2, RED),  # Mario
+            Player(200, SCREEN_HEIGHT - TILE_SIZE * 2, GREEN),  # Luigi
+        ]
 
         self.enemies = pygame.sprite.Group()
         self.enemies.add(Enemy(400, SCREEN_HEIGHT - TILE_SIZE, BLUE))
         self.enemies.add(Enemy(600, SCREEN_HEIGHT - TILE_SIZE, BLUE))
 
-        self.all_sprites = pygame.sprite.Group()
-        self.all_sprites.add(self.mario)
-        self.all_sprites.add(self.luigi)
-        self.all_sprites.add(self.enemies)
+        self.all_sprites = pygame.sprite.Group(self.players, self.enemies)
+
+    def load_scenario(self, enemies=2, players=2, seed=0):
+        """Replace the players and enemies with a seeded stress scenario."""
+        random.seed(seed)
+        self.players = [Player((100 + 100 * i) % (SCREEN_WIDTH - PLAYER_WIDTH), SCREEN_HEIGHT - TILE_SIZE * 2,
+                               PLAYER_COLORS[i % len(PLAYER_COLORS)])
+                        for i in range(players)]
+
+        self.enemies = pygame.sprite.Group(
+            Enemy(random.randrange(SCREEN_WIDTH - TILE_SIZE), SCREEN_HEIGHT - TILE_SIZE, BLUE)
+            for _ in range(enemies))
+        self.all_sprites = pygame.sprite.Group(self.players, self.enemies)
 
     def show_menu(self):
         menu_font = pygame.font.Font(None, 50)
@@ -140,51 +207,81 @@ class Game:
                         exit()
 
     def handle_input(self):
-        keys = pygame.key.get_pressed()
-
-        if keys[pygame.K_LEFT]:
-            self.mario.velocity_x = -PLAYER_SPEED
-        elif keys[pygame.K_RIGHT]:
-            self.mario.velocity_x = PLAYER_SPEED
-        else:
-            self.mario.velocity_x = 0
-
-        if keys[pygame.K_a]:
-            self.luigi.velocity_x = -PLAYER_SPEED
-        elif keys[pygame.K_d]:
-            self.luigi.velocity_x = PLAYER_SPEED
-        else:
-            self.luigi.velocity_x = 0
-
-        if keys[pygame.K_SPACE]:
-            self.mario.jump()
-        if keys[pygame.K_w]:
-            self.luigi.jump()
+        keys = self.input_source.get_pressed()
+
+        for i, player in enumerate(self.players):
+            left, right, jump = PLAYER_CONTROLS[i % len(PLAYER_CONTROLS)]
+            if keys[left]:
+                player.velocity_x = -PLAYER_SPEED
+            elif keys[right]:
+                player.velocity_x = PLAYER_SPEED
+            else:
+                player.velocity_x = 0
+
+            if keys[jump]:
+                player.jump()
 
     def update(self):
         self.all_sprites.update()
 
-    def draw(self):
+    def draw(self, alpha=1.0):
         self.screen.fill(WHITE)
         pygame.draw.rect(self.screen, GREEN, (0, SCREEN_HEIGHT - TILE_SIZE, SCREEN_WIDTH, TILE_SIZE))
         draw_castle(self.screen)
-        self.all_sprites.draw(self.screen)
+        draw_interpolated(self.screen, self.all_sprites, alpha)
         pygame.display.flip()
 
+    def step(self):
+        """Advance the simulation by one fixed physics step."""
+        for sprite in self.all_sprites:
+            sprite.previous_position = sprite.rect.topleft
+        self.handle_input()
+        self.update()
+
+    def run_headless(self, frames, script=HEADLESS_SCRIPT):
+        """Step input and physics frames times with no menu, drawing or frame cap; return simulated fps."""
+        self.input_source = ScriptedInput(script)
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.step()
+        return frames / (time.perf_counter() - start)
+
     def run(self):
         self.show_menu()
+        accumulator = 0.0
+        previous_time = time.perf_counter()
         while self.running:
+            now = time.perf_counter()
+            accumulator += min(now - previous_time, MAX_FRAME_TIME)
+            previous_time = now
+
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
 
-            self.handle_input() 
-            self.update()
-            self.draw()
-            self.clock.tick(60)
+            # Catch up with as many physics steps as the elapsed time needs, then render once
+            while accumulator >= PHYSICS_STEP:
+                self.step()
+                accumulator -= PHYSICS_STEP
+            self.draw(accumulator / PHYSICS_STEP)
+            self.clock.tick(MAX_RENDER_FPS)
 
         pygame.quit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(description="Super Mario FX")
+    parser.add_argument("--headless", type=int, metavar="FRAMES",
+                        help="simulate FRAMES fixed steps without a window and report simulated fps")
+    parser.add_argument("--enemies", type=int, help="stress scenario: number of enemies")
+    parser.add_argument("--players", type=int, help="stress scenario: number of players, taking turns on Mario's and Luigi's keys")
+    parser.add_argument("--seed", type=int, help="stress scenario: random seed (default 0)")
+    args = parser.parse_args()
+    scenario = {name: value for name, value in vars(args).items() if name != "headless" and value is not None}
+    game = Game(headless=bool(args.headless))
+    if scenario:
+        game.load_scenario(**scenario)
+    if args.headless:
+        fps = game.run_headless(args.headless)
+        print(f"Simulated {args.headless} frames at {fps:.0f} fps")
+    else:
+        game.run()
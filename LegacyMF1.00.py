@@ -1,6 +1,10 @@
 import pygame
+import os
+import time
+import argparse
 import random
 import math
+import numpy as np
 
 # Constants
 SCREEN_WIDTH = 800
@@ -22,11 +26,23 @@ PLAYER_SPEED = 5
 JUMP_FORCE = -15
 GRAVITY = 0.8
 
+# Keys (left, right, jump) and colours per player; extra players take turns reusing them
+PLAYER_CONTROLS = [
+    (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE),  # Mario
+    (pygame.K_a, pygame.K_d, pygame.K_w),  # Luigi
+]
+PLAYER_COLORS = [RED, GREEN]
+
 # Mode 7 Constants
 BACKGROUND_ROTATION_SPEED = 0.05
 BACKGROUND_MIN_SCALE = 0.5
 BACKGROUND_MAX_SCALE = 1.2
 
+# Fixed-timestep loop: physics constants are per step, so physics always runs at this rate
+PHYSICS_STEP = 1 / 60
+MAX_FRAME_TIME = 0.25  # Longest frame fed to the accumulator, so a stall can't snowball
+MAX_RENDER_FPS = 0  # 0 renders as often as the machine allows
+
 class Player(pygame.sprite.Sprite):
     def __init__(self, x, y, color):
         super().__init__()
@@ -35,6 +51,7 @@ class Player(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
+        self.previous_position = self.rect.topleft
         self.velocity_x = 0
         self.velocity_y = 0
         self.on_ground = False
@@ -54,23 +71,63 @@ class Player(pygame.sprite.Sprite):
             self.velocity_y = JUMP_FORCE
             self.on_ground = False
 
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x, y, color):
-        super().__init__()
+ENEMY_WALKING = 1  # EnemyStore.state value for enemies that patrol the screen
+
+class EnemyStore:
+    """All enemies held as parallel NumPy arrays (structure of arrays) and moved in one batch per step."""
+    FIELDS = ('x', 'y', 'previous_x', 'previous_y', 'velocity_x', 'state')
+
+    def __init__(self, color, capacity=16):
+        self.count = 0
+        for name in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=np.uint8 if name == 'state' else np.int32))
         self.image = pygame.Surface((TILE_SIZE, TILE_SIZE))
         self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.velocity_x = random.choice([-2, 2])
 
-    def update(self):
-        self.rect.x += self.velocity_x
+    def __len__(self):
+        return self.count
+
+    def add(self, x, y):
+        if self.count == len(self.x):
+            self.grow()
+        i = self.count
+        self.x[i] = self.previous_x[i] = x
+        self.y[i] = self.previous_y[i] = y
+        self.velocity_x[i] = random.choice([-2, 2])
+        self.state[i] = ENEMY_WALKING
+        self.count += 1
+
+    def grow(self):
+        capacity = max(len(self.x), 1) * 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def save_positions(self):
+        self.previous_x[:self.count] = self.x[:self.count]
+        self.previous_y[:self.count] = self.y[:self.count]
 
-        if self.rect.right > SCREEN_WIDTH:
-            self.velocity_x = -2
-        elif self.rect.left < 0:
-            self.velocity_x = 2
+    def update(self):
+        n = self.count
+        walking = self.state[:n] == ENEMY_WALKING
+        x, velocity_x = self.x[:n], self.velocity_x[:n]
+
+        # Walk, bouncing off the screen edges
+        x += velocity_x * walking
+        velocity_x[walking & (x + TILE_SIZE > SCREEN_WIDTH)] = -2
+        velocity_x[walking & (x < 0)] = 2
+
+    def draw(self, surface, alpha=1.0):
+        """Blit every walking enemy between its previous and current position, straight from the arrays."""
+        n = self.count
+        walking = self.state[:n] == ENEMY_WALKING
+        previous_x, previous_y = self.previous_x[:n][walking], self.previous_y[:n][walking]
+        x = np.rint(previous_x + (self.x[:n][walking] - previous_x) * alpha).astype(int)
+        y = np.rint(previous_y + (self.y[:n][walking] - previous_y) * alpha).astype(int)
+        image = self.image
+        surface.blits([(image, position) for position in zip(x.tolist(), y.tolist())], doreturn=False)
 
 def draw_castle(screen):
     castle_width = 200
@@ -96,29 +153,149 @@ def draw_castle(screen):
     door_y = castle_y + castle_height - door_height
     pygame.draw.rect(screen, BLACK, (door_x, door_y, door_width, door_height))
 
+class Mode7Background:
+    """Mode 7 style background: a tiled texture rotated and scaled per scanline into a reused buffer."""
+    def __init__(self, width, height, source):
+        self.width = width
+        self.height = height
+        self.color = None
+        if isinstance(source, pygame.Surface):
+            pixels = pygame.surfarray.array3d(source)
+            if (pixels == pixels[0, 0]).all():
+                self.color = tuple(int(c) for c in pixels[0, 0])
+        else:
+            self.color = source
+
+        if self.color is None:
+            # Flattened so texel (x, y) sits at x * texture_height + y
+            self.texture_width, self.texture_height = pixels.shape[:2]
+            self.texture = pixels.reshape(-1, 3)
+            self.columns = np.arange(width, dtype=np.float32)[:, None] - width / 2
+            self.rows = np.arange(height, dtype=np.float32) - height / 2
+            self.u = np.empty((width, height), dtype=np.float32)
+            self.v = np.empty((width, height), dtype=np.float32)
+            self.index = np.empty((width, height), dtype=np.intp)
+            self.buffer = np.empty((width, height, 3), dtype=np.uint8)
+            self.surface = pygame.Surface((width, height))
+            self.params = None
+
+    def scanline_params(self, angle, scale):
+        """Return per-scanline texture start (u0, v0) and the per-pixel step (du, dv)."""
+        radians = math.radians(angle)
+        du = math.cos(radians) / scale
+        dv = math.sin(radians) / scale
+        u0 = self.texture_width / 2 - self.rows * dv
+        v0 = self.texture_height / 2 + self.rows * du
+        return u0, v0, du, dv
+
+    def sample(self, angle, scale):
+        u0, v0, du, dv = self.scanline_params(angle, scale)
+        np.multiply(self.columns, du, out=self.u)
+        self.u += u0
+        np.remainder(self.u, self.texture_width, out=self.u)
+        np.multiply(self.columns, dv, out=self.v)
+        self.v += v0
+        np.remainder(self.v, self.texture_height, out=self.v)
+
+        self.index[...] = self.u
+        self.index *= self.texture_height
+        np.add(self.index, self.v, out=self.index, casting='unsafe')
+        np.take(self.texture, self.index, axis=0, out=self.buffer, mode='wrap')
+        pygame.surfarray.blit_array(self.surface, self.buffer)
+
+    def render(self, surface, angle, scale):
+        # The background covers a centered frame scaled with the effect, black outside it
+        scaled_width = int(self.width * scale)
+        scaled_height = int(self.height * scale)
+        frame = pygame.Rect((self.width - scaled_width) // 2, (self.height - scaled_height) // 2,
+                            scaled_width, scaled_height)
+        surface.fill(BLACK)
+
+        if self.color is not None:
+            # Rotating and scaling a solid fill changes nothing but the frame size
+            surface.fill(self.color, frame)
+            return
+
+        if self.params != (angle, scale):
+            self.sample(angle, scale)
+            self.params = (angle, scale)
+        frame = frame.clip(surface.get_rect())
+        surface.blit(self.surface, frame.topleft, frame)
+
+def draw_interpolated(surface, sprites, alpha):
+    """Blit sprites between their previous and current physics positions."""
+    for sprite in sprites:
+        previous_x, previous_y = sprite.previous_position
+        x = previous_x + (sprite.rect.x - previous_x) * alpha
+        y = previous_y + (sprite.rect.y - previous_y) * alpha
+        surface.blit(sprite.image, (round(x), round(y)))
+
+class ScriptedInput:
+    """Replays a looping script of (frames, keys) steps in place of pygame.key for headless runs."""
+    def __init__(self, script):
+        self.frames = [frozenset(keys) for count, keys in script for _ in range(count)]
+        self.frame = 0
+
+    def get_pressed(self):
+        keys = self.frames[self.frame % len(self.frames)]
+        self.frame += 1
+        return ScriptedKeys(keys)
+
+class ScriptedKeys:
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+# Default headless input: both players run right, jump, run back left, then stand still
+HEADLESS_SCRIPT = [
+    (60, [pygame.K_RIGHT, pygame.K_d]),
+    (10, [pygame.K_RIGHT, pygame.K_d, pygame.K_SPACE, pygame.K_w]),
+    (60, [pygame.K_LEFT, pygame.K_a]),
+    (30, []),
+]
+
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False):
+        # Headless runs use SDL's dummy video driver, so no window is ever shown
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        self.input_source = pygame.key
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Super Mario FX")
         self.clock = pygame.time.Clock()
         self.running = True
 
-        self.mario = Player(100, SCREEN_HEIGHT - TILE_SIZE * 2, RED)
-        self.luigi = Player(200, SCREEN_HEIGHT - TILE_SIZE * 2, GREEN)
+        self.players = [
+            Player(100, SCREEN_HEIGHT - TILE_SIZE * 2, RED),  # Mario
+            Player(200, SCREEN_HEIGHT - TILE_SIZE * 2, GREEN),  # Luigi
+        ]
 
-        self.enemies = pygame.sprite.Group()
-        self.enemies.add(Enemy(400, SCREEN_HEIGHT - TILE_SIZE, BLUE))
-        self.enemies.add(Enemy(600, SCREEN_HEIGHT - TILE_SIZE, BLUE))
+        self.enemies = EnemyStore(BLUE)
+        self.enemies.add(400, SCREEN_HEIGHT - TILE_SIZE)
+        self.enemies.add(600, SCREEN_HEIGHT - TILE_SIZE)
 
-        self.all_sprites = pygame.sprite.Group()
-        self.all_sprites.add(self.mario)
-        self.all_sprites.add(self.luigi)
-        self.all_sprites.add(self.enemies)
+        self.all_sprites = pygame.sprite.Group(self.players)
 
         self.background_angle = 0
         self.background_scale = 1.0
         self.background_scale_speed = 0.01  # Initialize instance variable
+        self.background = Mode7Background(SCREEN_WIDTH, SCREEN_HEIGHT, WHITE)
+
+    def load_scenario(self, enemies=2, players=2, seed=0):
+        """Replace the players and enemies with a seeded stress scenario."""
+        random.seed(seed)
+        self.players = [Player((100 + 100 * i) % (SCREEN_WIDTH - PLAYER_WIDTH), SCREEN_HEIGHT - TILE_SIZE * 2,
+                               PLAYER_COLORS[i % len(PLAYER_COLORS)])
+                        for i in range(players)]
+        self.all_sprites = pygame.sprite.Group(self.players)
+
+        self.enemies = EnemyStore(BLUE)
+        for _ in range(enemies):
+            self.enemies.add(random.randrange(SCREEN_WIDTH - TILE_SIZE), SCREEN_HEIGHT - TILE_SIZE)
 
     def show_menu(self):
         menu_font = pygame.font.Font(None, 50)
@@ -150,34 +327,23 @@ class Game:
                         exit()
 
     def handle_input(self):
-        keys = pygame.key.get_pressed()
+        keys = self.input_source.get_pressed()
 
-        if keys[pygame.K_LEFT]:
-            self.mario.velocity_x = -PLAYER_SPEED
-        elif keys[pygame.K_RIGHT]:
-            self.mario.velocity_x = PLAYER_SPEED
-        else:
-            self.mario.velocity_x = 0
-
-        if keys[pygame.K_a]:
-            self.luigi.velocity_x = -PLAYER_SPEED
-        elif keys[pygame.K_d]:
-            self.luigi.velocity_x = PLAYER_SPEED
-        else:
-            self.luigi.velocity_x = 0
+        for i, player in enumerate(self.players):
+            left, right, jump = PLAYER_CONTROLS[i % len(PLAYER_CONTROLS)]
+            if keys[left]:
+                player.velocity_x = -PLAYER_SPEED
+            elif keys[right]:
+                player.velocity_x = PLAYER_SPEED
+            else:
+                player.velocity_x = 0
 
-        if keys[pygame.K_SPACE]:
-            self.mario.jump()
-        if keys[pygame.K_w]:
-            self.luigi.jump()
+            if keys[jump]:
+                player.jump()
 
     def update(self):
         self.all_sprites.update()
-
-    def draw(self):
-        # Apply Mode 7-like background effect (rotation + scaling)
-        background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        background.fill(WHITE)
+        self.enemies.update()
 
         # Rotate and scale the background
         self.background_angle += BACKGROUND_ROTATION_SPEED
@@ -185,19 +351,9 @@ class Game:
         if self.background_scale > BACKGROUND_MAX_SCALE or self.background_scale < BACKGROUND_MIN_SCALE:
             self.background_scale_speed *= -1  # Reverse the scaling direction
 
-        # Rotate and scale the background
-        rotated_background = pygame.transform.rotate(background, self.background_angle)
-        scaled_width = int(SCREEN_WIDTH * self.background_scale)
-        scaled_height = int(SCREEN_HEIGHT * self.background_scale)
-        scaled_background = pygame.transform.scale(rotated_background, (scaled_width, scaled_height))
-
-        # Center the scaled background
-        bg_x = (SCREEN_WIDTH - scaled_width) // 2
-        bg_y = (SCREEN_HEIGHT - scaled_height) // 2
-
-        # Draw background and castle
-        self.screen.fill(BLACK)
-        self.screen.blit(scaled_background, (bg_x, bg_y))
+    def draw(self, alpha=1.0):
+        # Draw Mode 7 background
+        self.background.render(self.screen, self.background_angle, self.background_scale)
 
         # Draw ground (bottom green area)
         pygame.draw.rect(self.screen, GREEN, (0, SCREEN_HEIGHT - TILE_SIZE, SCREEN_WIDTH, TILE_SIZE))
@@ -206,23 +362,62 @@ class Game:
         draw_castle(self.screen)
 
         # Draw all sprites
-        self.all_sprites.draw(self.screen)
+        draw_interpolated(self.screen, self.all_sprites, alpha)
+        self.enemies.draw(self.screen, alpha)
         pygame.display.flip()
 
+    def step(self):
+        """Advance the simulation by one fixed physics step."""
+        for sprite in self.all_sprites:
+            sprite.previous_position = sprite.rect.topleft
+        self.enemies.save_positions()
+        self.handle_input()
+        self.update()
+
+    def run_headless(self, frames, script=HEADLESS_SCRIPT):
+        """Step input and physics frames times with no menu, drawing or frame cap; return simulated fps."""
+        self.input_source = ScriptedInput(script)
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.step()
+        return frames / (time.perf_counter() - start)
+
     def run(self):
         self.show_menu()
+        accumulator = 0.0
+        previous_time = time.perf_counter()
         while self.running:
+            now = time.perf_counter()
+            accumulator += min(now - previous_time, MAX_FRAME_TIME)
+            previous_time = now
+
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
 
-            self.handle_input()
-            self.update()
-            self.draw()
-            self.clock.tick(60)
+            # Catch up with as many physics steps as the elapsed time needs, then render once
+            while accumulator >= PHYSICS_STEP:
+                self.step()
+                accumulator -= PHYSICS_STEP
+            self.draw(accumulator / PHYSICS_STEP)
+            self.clock.tick(MAX_RENDER_FPS)
 
         pygame.quit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(description="Super Mario FX")
+    parser.add_argument("--headless", type=int, metavar="FRAMES",
+                        help="simulate FRAMES fixed steps without a window and report simulated fps")
+    parser.add_argument("--enemies", type=int, help="stress scenario: number of enemies")
+    parser.add_argument("--players", type=int, help="stress scenario: number of players, taking turns on Mario's and Luigi's keys")
+    parser.add_argument("--seed", type=int, help="stress scenario: random seed (default 0)")
+    args = parser.parse_args()
+    scenario = {name: value for name, value in vars(args).items() if name != "headless" and value is not None}
+    game = Game(headless=bool(args.headless))
+    if scenario:
+        game.load_scenario(**scenario)
+    if args.headless:
+        fps = game.run_headless(args.headless)
+        print(f"Simulated {args.headless} frames at {fps:.0f} fps")
+    else:
+        game.run()
@@ -0,0 +1,611 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import statistics
+import subprocess
+import tracemalloc
+import argparse
+import tempfile
+import importlib.util
+
+# Run every benchmark offscreen
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_variant(filename, module_name=None):
+    """Import one of the game scripts by file name (several are not valid module names)."""
+    module_name = module_name or "bench_" + "".join(c if c.isalnum() else "_" for c in filename[:-3])
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate_level(columns, rows=10, seed=0):
+    """Generate a level_design grid with a solid floor and scattered platforms."""
+    rng = random.Random(seed)
+    level_design = [[0] * columns for _ in range(rows)]
+    level_design[-1] = [1] * columns
+    for row in range(4, rows - 1):
+        col = rng.randrange(0, 6)
+        while col < columns:
+            length = rng.randint(2, 4)
+            for c in range(col, min(col + length, columns)):
+                level_design[row][c] = rng.choice((1, 2))
+            col += length + rng.randint(3, 8)
+    return level_design
+
+
+def time_frames(step, frames):
+    """Run step() for the given number of frames and return mean milliseconds per frame."""
+    start = time.perf_counter()
+    for _ in range(frames):
+        step()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+class SpriteTile(pygame.sprite.Sprite):
+    """One Sprite and Surface per tile, as the game built tiles before TileGrid."""
+    def __init__(self, x, y, color, size):
+        super().__init__()
+        self.image = pygame.Surface((size, size))
+        self.image.fill(color)
+        self.rect = self.image.get_rect(topleft=(x, y))
+
+
+def build_sprite_tiles(game, level_design):
+    tiles = pygame.sprite.Group()
+    for row_index, row in enumerate(level_design):
+        for col_index, tile_type in enumerate(row):
+            if tile_type:
+                x = col_index * game.TILE_SIZE
+                y = row_index * game.TILE_SIZE
+                tiles.add(SpriteTile(x, y, game.TILE_COLORS[tile_type], game.TILE_SIZE))
+    return tiles
+
+
+class SpriteEnemy(pygame.sprite.Sprite):
+    """One Sprite per enemy updated one at a time, as the game moved enemies before EnemyStore."""
+    def __init__(self, x, y, color, size):
+        super().__init__()
+        self.image = pygame.Surface((size, size))
+        self.image.fill(color)
+        self.rect = self.image.get_rect(topleft=(x, y))
+        self.velocity_x = random.choice([-1, 1])
+
+    def update(self, tiles):
+        self.rect.x += self.velocity_x
+        for tile in tiles.spritecollide(self):
+            self.velocity_x = -self.velocity_x
+
+        self.rect.y += 1
+        tile_collisions = tiles.spritecollide(self)
+        if not tile_collisions:
+            self.velocity_x = -self.velocity_x
+        else:
+            self.rect.bottom = tile_collisions[0].rect.top
+
+
+class GroupScan:
+    """Collision source that scans a whole sprite Group, as the game did before TileGrid."""
+    def __init__(self, group, columns):
+        self.group = group
+        self.columns = columns
+
+    def spritecollide(self, sprite):
+        return pygame.sprite.spritecollide(sprite, self.group, False)
+
+
+def bench_collision(args):
+    """Compare per-frame physics cost of TileGrid lookups against full Group scans."""
+    game = load_variant("legacymarioftvv2.py")
+    pygame.init()
+    print(f"{'columns':>8} {'tiles':>8} {'group ms':>10} {'grid ms':>10} {'speedup':>8}")
+    for columns in args.widths:
+        level_design = generate_level(columns, seed=args.seed)
+        tiles = build_sprite_tiles(game, level_design)
+        grid = game.TileGrid(level_design)
+
+        results = []
+        for source in (GroupScan(tiles, columns), grid):
+            random.seed(args.seed)
+            players = [game.Player(100, 0, game.RED), game.Player(160, 0, game.GREEN)]
+            players[0].velocity_x = game.PLAYER_SPEED
+            players[1].velocity_x = -game.PLAYER_SPEED
+            enemies = pygame.sprite.Group(SpriteEnemy(400, 0, game.BLUE, game.TILE_SIZE),
+                                          SpriteEnemy(600, 0, game.BLUE, game.TILE_SIZE))
+
+            def step():
+                for player in players:
+                    player.update(source)
+                enemies.update(source)
+
+            results.append(time_frames(step, args.frames))
+
+        group_ms, grid_ms = results
+        print(f"{columns:>8} {len(tiles):>8} {group_ms:>10.4f} {grid_ms:>10.4f} {group_ms / grid_ms:>7.1f}x")
+
+
+def bench_enemies(args):
+    """Compare per-step update and draw cost of per-sprite enemies against the batched EnemyStore."""
+    game = load_variant("legacymarioftvv2.py")
+    pygame.init()
+    screen = pygame.display.set_mode((game.SCREEN_WIDTH, game.SCREEN_HEIGHT))
+    grid = game.TileGrid(generate_level(args.columns, seed=args.seed))
+    width = args.columns * game.TILE_SIZE
+    print(f"{'enemies':>8} {'sprite ms':>10} {'store ms':>10} {'speedup':>8} {'store fps':>10}")
+    for count in args.counts:
+        random.seed(args.seed)
+        sprites = pygame.sprite.Group(SpriteEnemy(spread(i, count, width), 0, game.BLUE, game.TILE_SIZE)
+                                      for i in range(count))
+        random.seed(args.seed)
+        store = game.EnemyStore()
+        for i in range(count):
+            store.add(spread(i, count, width), 0)
+
+        def sprite_step():
+            sprites.update(grid)
+            sprites.draw(screen)
+
+        def store_step():
+            store.save_positions()
+            store.update(grid)
+            store.draw(screen)
+
+        sprite_ms = time_frames(sprite_step, args.frames)
+        store_ms = time_frames(store_step, args.frames)
+        print(f"{count:>8} {sprite_ms:>10.3f} {store_ms:>10.3f} {sprite_ms / store_ms:>7.1f}x {1000 / store_ms:>10.1f}")
+
+
+def measure(build):
+    """Return (result, peak bytes, milliseconds) for one call of build()."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+def bench_memory(args):
+    """Report tracemalloc peak memory and load time for tile storage of a large generated level."""
+    game = load_variant("legacymarioftvv2.py")
+    pygame.init()
+    level_design = generate_level(args.columns, args.rows, seed=args.seed)
+    grid, peak, elapsed = measure(lambda: game.TileGrid(level_design))
+    print(f"TileGrid:     {len(grid):>8} tiles {peak / 1024 ** 2:>9.2f} MiB {elapsed:>9.2f} ms")
+
+    # Surfaces are allocated by SDL, so the sprite baseline adds their pixel bytes to the Python peak
+    sprite_design = [row[:args.sprite_columns] for row in level_design]
+    tiles, peak, elapsed = measure(lambda: build_sprite_tiles(game, sprite_design))
+    pixels = len(tiles) * game.TILE_SIZE * game.TILE_SIZE * 4
+    print(f"Sprite tiles: {len(tiles):>8} tiles {(peak + pixels) / 1024 ** 2:>9.2f} MiB {elapsed:>9.2f} ms")
+
+
+def bench_level(args):
+    """Compare load time of a memory-mapped binary level file against building a TileGrid from the list literal."""
+    game = load_variant("legacymarioftvv2.py")
+    pygame.init()
+    level_design = generate_level(args.columns, args.rows, seed=args.seed)
+    entities = [(game.ENTITY_ENEMY, x * game.TILE_SIZE, 0) for x in range(0, args.columns, 10)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench" + game.LEVEL_EXTENSION)
+        game.save_level_file(path, level_design, entities)
+        print(f"{args.columns}x{args.rows} level, {len(entities)} entities, {os.path.getsize(path)} bytes on disk")
+
+        ms = time_frames(lambda: game.TileGrid(level_design), args.runs)
+        print(f"{'TileGrid from list':>20}: {ms:>9.4f} ms")
+        ms = time_frames(lambda: game.LevelFile(path), args.runs)
+        print(f"{'mapped level file':>20}: {ms:>9.4f} ms")
+
+
+def bench_stream(args):
+    """Compare startup and memory of a fully loaded TileGrid against a StreamingTileGrid scrolled end to end."""
+    game = load_variant("legacymarioftvv2.py")
+    pygame.init()
+    screen = pygame.display.set_mode((game.SCREEN_WIDTH, game.SCREEN_HEIGHT))
+    level_design = generate_level(args.columns, args.rows, seed=args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        game.save_level_chunks(level_design, directory)
+        for label, build in (("TileGrid", lambda: game.TileGrid(level_design)),
+                             ("streaming", lambda: game.StreamingTileGrid(directory))):
+            grid, peak, elapsed = measure(build)
+            print(f"{label:>10} startup: {elapsed:>9.2f} ms {peak / 1024 ** 2:>9.2f} MiB")
+
+        grid = game.StreamingTileGrid(directory)
+        layer = game.TileLayer(grid)
+        camera_x = 0
+        resident = 0
+
+        def step():
+            nonlocal camera_x, resident
+            camera_x = (camera_x + args.scroll) % (args.columns * game.TILE_SIZE)
+            grid.stream(camera_x, screen.get_width())
+            layer.draw(screen, camera_x)
+            resident = max(resident, len(grid.chunks))
+
+        frames = args.columns * game.TILE_SIZE // args.scroll
+        ms = time_frames(step, frames)
+        print(f"scrolled {frames} frames: {ms:.3f} ms/frame, at most {resident} of {grid.chunk_count} chunks resident")
+
+
+def bench_floor(args):
+    """Measure FTRender Mode 7 floor throughput in frames per second."""
+    demake = load_variant("DemakeMF-FX.py")
+    pygame.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    renderer = demake.FTRender(args.width, args.height)
+    renderer.load_texture(demake.make_floor_texture())
+    camera = pygame.math.Vector2(0, 0)
+    frame = 0
+
+    def step():
+        nonlocal frame
+        frame += 1
+        camera.x += 2
+        renderer.render(screen, camera, frame * 0.5)
+
+    ms = time_frames(step, args.frames)
+    print(f"FTRender {args.width}x{args.height}: {ms:.3f} ms/frame, {1000 / ms:.1f} fps")
+
+
+def bench_menu(args):
+    """Measure DemakeMF-FX menu update and draw cost per frame on the main and credits screens."""
+    demake = load_variant("DemakeMF-FX.py")
+    pygame.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    menu = demake.MenuSystem(args.width, args.height)
+    for ring in (False, True):
+        menu.bg_grid = demake.GridBackground(args.width, args.height, ring=ring)
+        for state in (demake.MenuState.MAIN, demake.MenuState.CREDITS):
+            def step():
+                menu.state = state
+                menu.update()
+                menu.draw(screen)
+
+            ms = time_frames(step, args.frames)
+            label = f"{state.value}{' (ring)' if ring else ''}"
+            print(f"{label:>15}: {ms:.3f} ms/frame, {1000 / ms:.1f} fps")
+
+
+def make_sprite_sheet(path, width=64, height=112):
+    """Write a synthetic sprite sheet large enough for every region in 4kMF1.0's sprite_locations."""
+    sheet = pygame.Surface((width, height), pygame.SRCALPHA)
+    for x in range(0, width, 16):
+        for y in range(0, height, 8):
+            sheet.fill((x * 4 % 256, y * 2 % 256, 128, 255), (x, y, 16, 8))
+    pygame.image.save(sheet, path)
+
+
+def make_atlas_source(kmf, directory):
+    """Copy the atlas manifest next to a synthetic sheet in directory and return the manifest path."""
+    manifest_path = os.path.join(directory, kmf.ATLAS_MANIFEST)
+    shutil.copy(os.path.join(ROOT, kmf.ATLAS_MANIFEST), manifest_path)
+    make_sprite_sheet(os.path.join(directory, "sprites.png"))
+    return manifest_path
+
+
+def bench_atlas(args):
+    """Compare SpriteSheet startup from the PNG (compiling the atlas) against the cached binary atlas."""
+    kmf = load_variant("4kMF1.0.py")
+    pygame.init()
+    pygame.display.set_mode((kmf.SCREEN_WIDTH, kmf.SCREEN_HEIGHT))
+    with tempfile.TemporaryDirectory() as directory:
+        manifest_path = make_atlas_source(kmf, directory)
+        cache_path = os.path.splitext(manifest_path)[0] + ".atlas"
+        for label, warm in (("png decode", False), ("cached atlas", True)):
+            def startup():
+                if not warm and os.path.exists(cache_path):
+                    os.remove(cache_path)
+                kmf.SpriteSheet(manifest_path)
+
+            startup()
+            ms = time_frames(startup, args.runs)
+            print(f"{label:>12}: {ms:.3f} ms per SpriteSheet load")
+
+
+def bench_spawn(args):
+    """Spawn many enemies and compare per-enemy cost of re-slicing the sheet against the shared frame registry."""
+    kmf = load_variant("4kMF1.0.py")
+    pygame.init()
+    pygame.display.set_mode((kmf.SCREEN_WIDTH, kmf.SCREEN_HEIGHT))
+    with tempfile.TemporaryDirectory() as directory:
+        sheet = kmf.SpriteSheet(make_atlas_source(kmf, directory))
+
+        def reslice():
+            # What spawning cost with no shared frames: copy, scale and flip every frame per enemy
+            enemies = []
+            for character in ("goomba", "koopa"):
+                for _ in range(args.count // 2):
+                    frames = []
+                    for state in (kmf.IDLE, kmf.WALKING, kmf.JUMPING):
+                        for rect in sheet.sprite_locations[character].get(state, ()):
+                            frame = sheet.get_sprite(*rect).copy()
+                            frame = pygame.transform.scale(frame, (frame.get_width() * 2, frame.get_height() * 2))
+                            frames += [frame, pygame.transform.flip(frame, True, False)]
+                    enemies.append(frames)
+            return enemies
+
+        def spawn():
+            return [kmf.AnimatedSprite(sheet, character, 400, 500)
+                    for character in ("goomba", "koopa")
+                    for _ in range(args.count // 2)]
+
+        spawn()  # Warm the registry so only the per-enemy cost is measured
+        for name, build in (("re-slice", reslice), ("registry", spawn)):
+            # Time without tracemalloc, whose hooks would dominate such short calls, then trace memory separately
+            start = time.perf_counter()
+            build()
+            elapsed = (time.perf_counter() - start) * 1000
+            result, peak, _ = measure(build)
+            if build is reslice:
+                # Surface pixels live outside the Python heap, so tracemalloc does not see them
+                peak += sum(frame.get_width() * frame.get_height() * 4 for frames in result for frame in frames)
+            print(f"{name}: {elapsed / args.count * 1000:>8.2f} us/enemy {peak / args.count:>8.0f} bytes/enemy")
+
+
+def spread(index, count, width):
+    """x position for the index-th of count entities spread across width pixels."""
+    return (index + 1) * width // (count + 1)
+
+
+# name: (script, draw method, whether the level width can be set)
+SUITE_VARIANTS = {
+    "legacymarioftvv2": ("legacymarioftvv2.py", "draw", True),
+    "LegacyMF1.00": ("LegacyMF1.00.py", "draw", False),
+    "LG!MF1.0": ("LG!MF1.0.py", "draw", False),
+    "4kMF1.0": ("4kMF1.0.py", "draw", False),
+    "DemakeMF-FX": ("DemakeMF-FX.py", "render", False),
+    "TheLegacy1983build": ("TheLegacy1983build.py", "draw", False),
+}
+
+
+def frame_stats(frame_times, allocations, blocks):
+    quantiles = statistics.quantiles(frame_times, n=100)
+    return {
+        "frames": len(frame_times),
+        "mean_ms": statistics.fmean(frame_times),
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+        "alloc_bytes_per_frame": statistics.fmean(allocations),
+        "net_blocks_per_frame": statistics.fmean(blocks),
+    }
+
+
+def profile_frames(step, args):
+    """Time each frame of step(), then sample per-frame allocations in a separate traced pass."""
+    # Warm-up frames absorb one-off costs such as shader compiles and cache fills
+    for _ in range(args.warmup):
+        step()
+
+    frame_times = []
+    for _ in range(args.frames):
+        start = time.perf_counter()
+        step()
+        frame_times.append((time.perf_counter() - start) * 1000)
+
+    # tracemalloc slows everything down, so allocations are measured apart from timing
+    allocations = []
+    blocks = []
+    tracemalloc.start()
+    for _ in range(args.alloc_frames):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        blocks_before = sys.getallocatedblocks()
+        step()
+        _, peak = tracemalloc.get_traced_memory()
+        allocations.append(peak - before)
+        blocks.append(sys.getallocatedblocks() - blocks_before)
+    tracemalloc.stop()
+    return frame_stats(frame_times, allocations, blocks)
+
+
+def suite_pygame(name, args):
+    filename, draw_method, has_columns = SUITE_VARIANTS[name]
+    module = load_variant(filename)
+    results = []
+    for columns in args.columns if has_columns else [None]:
+        for entities in args.entities:
+            game = module.Game(headless=True)
+            scenario = {"enemies": entities, "seed": args.seed}
+            if has_columns:
+                scenario.update(columns=columns, tiles=columns)
+            game.load_scenario(**scenario)
+            game.input_source = module.ScriptedInput(module.HEADLESS_SCRIPT)
+            draw = getattr(game, draw_method)
+            draw()  # The run loop draws before the first physics step, so that must work too
+
+            def step():
+                game.step()
+                draw()
+
+            scenario = {"entities": entities, "columns": columns}
+            results.append({"variant": name, "scenario": scenario,
+                            **profile_frames(step, args)})
+            print(f"{name:>18} entities={entities:<6} columns={str(columns):<6} "
+                  f"p50={results[-1]['p50_ms']:.3f}ms p99={results[-1]['p99_ms']:.3f}ms")
+    return results
+
+
+def suite_ursina(args):
+    """Drive FUN.py's Mario3DEngine; it needs a display (e.g. run under xvfb-run)."""
+    try:
+        fun = load_variant("FUN.py")
+        engine = fun.Mario3DEngine()
+    except Exception as e:
+        print(f"{'FUN':>18} skipped: {e}")
+        return [{"variant": "FUN", "skipped": str(e)}]
+
+    results = []
+    for entities in args.entities:
+        level = dict(engine.levels[0], enemies=entities, coins=entities, platforms=entities)
+        engine.clear_scene()
+        engine.create_level_elements(level)
+
+        def step():
+            engine.step()
+
+        scenario = {"entities": entities, "columns": None}
+        results.append({"variant": "FUN", "scenario": scenario,
+                        **profile_frames(step, args)})
+        print(f"{'FUN':>18} entities={entities:<6} p50={results[-1]['p50_ms']:.3f}ms "
+              f"p99={results[-1]['p99_ms']:.3f}ms")
+    return results
+
+
+def bench_switch(args):
+    """Measure FUN.py's level switch time as entity counts grow; it needs a display (e.g. run under xvfb-run)."""
+    try:
+        fun = load_variant("FUN.py")
+        engine = fun.Mario3DEngine()
+    except Exception as e:
+        print(f"switch skipped: {e}")
+        return
+
+    for count in args.counts:
+        levels = [dict(level, enemies=count, coins=count, platforms=count) for level in engine.levels]
+        times = []
+        for run in range(args.runs):
+            start = time.perf_counter()
+            engine.clear_scene()
+            engine.create_level_elements(levels[run % len(levels)])
+            times.append((time.perf_counter() - start) * 1000)
+        # The first switch at each count fills the pools; later ones only reuse them
+        print(f"{count:>6} entities: first {times[0]:>8.2f} ms, "
+              f"pooled median {statistics.median(times[1:]):>8.2f} ms")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_suite(args):
+    """Profile frame times (p50/p95/p99) and allocations per frame for every game variant into JSON."""
+    pygame.init()
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "frames": args.frames,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        # 4kMF1.0 loads its sprite atlas relative to the working directory
+        make_atlas_source(load_variant("4kMF1.0.py"), directory)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            for name in args.variants:
+                if name == "FUN":
+                    report["results"].extend(suite_ursina(args))
+                else:
+                    report["results"].extend(suite_pygame(name, args))
+        finally:
+            os.chdir(cwd)
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offscreen benchmarks for the Mario Forever builds")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    collision = subparsers.add_parser("collision", help=bench_collision.__doc__)
+    collision.add_argument("--widths", type=int, nargs="+", default=[25, 100, 250, 1000])
+    collision.add_argument("--frames", type=int, default=600)
+    collision.add_argument("--seed", type=int, default=0)
+    collision.set_defaults(func=bench_collision)
+
+    enemies = subparsers.add_parser("enemies", help=bench_enemies.__doc__)
+    enemies.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 10000])
+    enemies.add_argument("--columns", type=int, default=2000)
+    enemies.add_argument("--frames", type=int, default=60)
+    enemies.add_argument("--seed", type=int, default=0)
+    enemies.set_defaults(func=bench_enemies)
+
+    memory = subparsers.add_parser("memory", help=bench_memory.__doc__)
+    memory.add_argument("--columns", type=int, default=5000)
+    memory.add_argument("--rows", type=int, default=60)
+    memory.add_argument("--sprite-columns", type=int, default=400,
+                        help="columns of the level built as one Sprite per tile for comparison")
+    memory.add_argument("--seed", type=int, default=0)
+    memory.set_defaults(func=bench_memory)
+
+    level = subparsers.add_parser("level", help=bench_level.__doc__)
+    level.add_argument("--columns", type=int, default=10000)
+    level.add_argument("--rows", type=int, default=100)
+    level.add_argument("--runs", type=int, default=20)
+    level.add_argument("--seed", type=int, default=0)
+    level.set_defaults(func=bench_level)
+
+    stream = subparsers.add_parser("stream", help=bench_stream.__doc__)
+    stream.add_argument("--columns", type=int, default=100000)
+    stream.add_argument("--rows", type=int, default=10)
+    stream.add_argument("--scroll", type=int, default=64, help="camera pixels per frame")
+    stream.add_argument("--seed", type=int, default=0)
+    stream.set_defaults(func=bench_stream)
+
+    floor = subparsers.add_parser("floor", help=bench_floor.__doc__)
+    floor.add_argument("--width", type=int, default=800)
+    floor.add_argument("--height", type=int, default=600)
+    floor.add_argument("--frames", type=int, default=300)
+    floor.set_defaults(func=bench_floor)
+
+    menu = subparsers.add_parser("menu", help=bench_menu.__doc__)
+    menu.add_argument("--width", type=int, default=800)
+    menu.add_argument("--height", type=int, default=600)
+    menu.add_argument("--frames", type=int, default=600)
+    menu.set_defaults(func=bench_menu)
+
+    atlas = subparsers.add_parser("atlas", help=bench_atlas.__doc__)
+    atlas.add_argument("--runs", type=int, default=200)
+    atlas.set_defaults(func=bench_atlas)
+
+    spawn = subparsers.add_parser("spawn", help=bench_spawn.__doc__)
+    spawn.add_argument("--count", type=int, default=10000)
+    spawn.set_defaults(func=bench_spawn)
+
+    switch = subparsers.add_parser("switch", help=bench_switch.__doc__)
+    switch.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    switch.add_argument("--runs", type=int, default=20)
+    switch.set_defaults(func=bench_switch)
+
+    suite = subparsers.add_parser("suite", help=bench_suite.__doc__)
+    suite.add_argument("--variants", nargs="+", default=[*SUITE_VARIANTS, "FUN"],
+                       choices=[*SUITE_VARIANTS, "FUN"])
+    suite.add_argument("--entities", type=int, nargs="+", default=[2, 100, 1000])
+    suite.add_argument("--columns", type=int, nargs="+", default=[25, 250, 1000],
+                       help="level widths for variants with tile levels")
+    suite.add_argument("--frames", type=int, default=300)
+    suite.add_argument("--alloc-frames", type=int, default=50)
+    suite.add_argument("--warmup", type=int, default=10)
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--output", default="benchmark_results.json")
+    suite.set_defaults(func=bench_suite)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
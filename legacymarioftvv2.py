@@ -1,11 +1,35 @@
 import pygame
+import os
+import time
+import json
+import mmap
+import struct
+import argparse
 import random
 import math
+import numpy as np
+from array import array
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 TILE_SIZE = 32  # Changed to 32 for a more classic feel
+CHUNK_COLUMNS = 16  # Tile columns per cached tile layer chunk and per streamed level chunk
+
+# Streamed levels: a directory holding a JSON header and one raw file per column chunk
+LEVEL_MANIFEST = "level.json"
+LEVEL_PRELOAD_CHUNKS = 2  # Chunks past each edge of the view loaded ahead in the background
+LEVEL_KEEP_CHUNKS = 4  # Chunks farther than this from the view are evicted
+
+# Binary levels: header, row-major uint8 tile grid, then the entity table; memory-mapped on load
+LEVEL_EXTENSION = ".level"
+LEVEL_MAGIC = b"MFLEVEL1"
+LEVEL_HEADER = struct.Struct("<8sIII")  # magic, rows, columns, entity count
+ENTITY_DTYPE = np.dtype([("kind", "u1"), ("x", "<i4"), ("y", "<i4")])
+ENTITY_PLAYER = 1
+ENTITY_ENEMY = 2
 
 # Colors
 WHITE = (255, 255, 255)
@@ -16,6 +40,7 @@ BLUE = (0, 0, 255)
 BRICK_COLOR = (160, 32, 240)  # A more classic brick color
 GROUND_COLOR = (139, 69, 19)  # Brown for ground
 EMPTY_COLOR = (92, 148, 252) # Light blue for empty space
+TILE_COLORS = {1: GROUND_COLOR, 2: BRICK_COLOR}
 
 # Player properties
 PLAYER_WIDTH = 24  # Slightly smaller player
@@ -24,11 +49,29 @@ PLAYER_SPEED = 3
 JUMP_FORCE = -10
 GRAVITY = 0.5
 
+# Keys (left, right, jump) and colours per player; extra players take turns reusing them
+PLAYER_CONTROLS = [
+    (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE),  # Mario
+    (pygame.K_a, pygame.K_d, pygame.K_w),  # Luigi
+]
+PLAYER_COLORS = [RED, GREEN]
+
+# Stress scenarios (--enemies, --players, --columns, --tiles, --seed)
+LEVEL_ROWS = 10
+
+# Camera
+CULL_MARGIN = TILE_SIZE  # Sprites this far outside the view are still drawn, covering interpolation
+
 # Mode 7 Constants
 BACKGROUND_ROTATION_SPEED = 0.05
 BACKGROUND_MIN_SCALE = 0.5
 BACKGROUND_MAX_SCALE = 1.2
 
+# Fixed-timestep loop: physics constants are per step, so physics always runs at this rate
+PHYSICS_STEP = 1 / 60
+MAX_FRAME_TIME = 0.25  # Longest frame fed to the accumulator, so a stall can't snowball
+MAX_RENDER_FPS = 0  # 0 renders as often as the machine allows
+
 class Player(pygame.sprite.Sprite):
     def __init__(self, x, y, color):
         super().__init__()
@@ -37,6 +80,7 @@ class Player(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
+        self.previous_position = self.rect.topleft
         self.velocity_x = 0
         self.velocity_y = 0
         self.on_ground = False
@@ -46,7 +90,7 @@ class Player(pygame.sprite.Sprite):
 
         # Horizontal movement
         self.rect.x += self.velocity_x
-        tile_collisions = pygame.sprite.spritecollide(self, tiles, False)
+        tile_collisions = tiles.spritecollide(self)
         for tile in tile_collisions:
             if self.velocity_x > 0:
                 self.rect.right = tile.rect.left
@@ -56,7 +100,7 @@ class Player(pygame.sprite.Sprite):
         # Vertical movement
         self.rect.y += self.velocity_y
         self.on_ground = False
-        tile_collisions = pygame.sprite.spritecollide(self, tiles, False)
+        tile_collisions = tiles.spritecollide(self)
         for tile in tile_collisions:
             if self.velocity_y > 0:
                 self.rect.bottom = tile.rect.top
@@ -66,6 +110,13 @@ class Player(pygame.sprite.Sprite):
                 self.rect.top = tile.rect.bottom
                 self.velocity_y = 0
 
+        # Keep within the level horizontally; the camera scrolls to follow
+        level_width = tiles.columns * TILE_SIZE
+        if self.rect.left < 0:
+            self.rect.left = 0
+        elif self.rect.right > level_width:
+            self.rect.right = level_width
+
         # Keep within screen bounds (optional)
         if self.rect.bottom > SCREEN_HEIGHT:
             self.rect.bottom = SCREEN_HEIGHT
@@ -80,74 +131,535 @@ class Player(pygame.sprite.Sprite):
             self.velocity_y = JUMP_FORCE
             self.on_ground = False
 
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
+ENEMY_WALKING = 1  # EnemyStore.state value for enemies that walk and fall
+
+class EnemyStore:
+    """All enemies held as parallel NumPy arrays (structure of arrays) and moved in one batch per step."""
+    FIELDS = ('x', 'y', 'previous_x', 'previous_y', 'velocity_x', 'state')
+
+    def __init__(self, capacity=16):
+        self.count = 0
+        for name in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=np.uint8 if name == 'state' else np.int32))
         self.image = pygame.Surface((TILE_SIZE, TILE_SIZE))
         self.image.fill(BLUE)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.velocity_x = random.choice([-1, 1]) * 1  # Slower enemy speed
-
-    def update(self, tiles):
-        self.rect.x += self.velocity_x
-        tile_collisions = pygame.sprite.spritecollide(self, tiles, False)
-        for tile in tile_collisions:
-            if self.velocity_x > 0:
-                self.velocity_x = -abs(self.velocity_x)
-            elif self.velocity_x < 0:
-                self.velocity_x = abs(self.velocity_x)
 
-        self.rect.y += 1  # Simple gravity for enemies
-        tile_collisions = pygame.sprite.spritecollide(self, tiles, False)
-        if not tile_collisions:
-            # If falling off an edge, reverse direction
-            if self.velocity_x > 0:
-                self.velocity_x = -abs(self.velocity_x)
-            elif self.velocity_x < 0:
-                self.velocity_x = abs(self.velocity_x)
+    def __len__(self):
+        return self.count
+
+    def add(self, x, y):
+        if self.count == len(self.x):
+            self.grow()
+        i = self.count
+        self.x[i] = self.previous_x[i] = x
+        self.y[i] = self.previous_y[i] = y
+        self.velocity_x[i] = random.choice([-1, 1]) * 1  # Slower enemy speed
+        self.state[i] = ENEMY_WALKING
+        self.count += 1
+
+    def grow(self):
+        capacity = max(len(self.x), 1) * 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def save_positions(self):
+        self.previous_x[:self.count] = self.x[:self.count]
+        self.previous_y[:self.count] = self.y[:self.count]
+
+    @staticmethod
+    def tile_hits(cells, x, y):
+        """Count solid tiles in the (up to) two tile rows each enemy's box overlaps."""
+        rows, columns = cells.shape
+        first_col, last_col = x // TILE_SIZE, (x + TILE_SIZE - 1) // TILE_SIZE
+        first_row, last_row = y // TILE_SIZE, (y + TILE_SIZE - 1) // TILE_SIZE
+        two_cols = last_col != first_col
+
+        def solid(row, col):
+            inside = (row >= 0) & (row < rows) & (col >= 0) & (col < columns)
+            return (inside & (cells[row.clip(0, rows - 1), col.clip(0, columns - 1)] != 0)).astype(np.int32)
+
+        top = solid(first_row, first_col) + (solid(first_row, last_col) & two_cols)
+        bottom = (solid(last_row, first_col) + (solid(last_row, last_col) & two_cols)) * (last_row != first_row)
+        return first_row, last_row, top, bottom
+
+    def update(self, tile_grid):
+        n = self.count
+        walking = self.state[:n] == ENEMY_WALKING
+        x, y, velocity_x = self.x[:n], self.y[:n], self.velocity_x[:n]
+        first_col, cells = tile_grid.active_region()
+        last_col = first_col + cells.shape[1]
+        offset = first_col * TILE_SIZE
+
+        # Enemies away from the loaded part of a streamed level wait until it comes near
+        if first_col > 0:
+            walking &= x >= (first_col + 1) * TILE_SIZE
+        if last_col < tile_grid.columns:
+            walking &= x < (last_col - 2) * TILE_SIZE
+
+        # Walk, turning around once per tile hit (so two tiles at once cancel out)
+        x += velocity_x * walking
+        first_row, last_row, top, bottom = self.tile_hits(cells, x - offset, y)
+        velocity_x[walking & ((top + bottom) % 2 == 1)] *= -1
+
+        # Simple gravity: fall a pixel, turn around at ledges, otherwise stand on the topmost tile touched
+        y += walking
+        first_row, last_row, top, bottom = self.tile_hits(cells, x - offset, y)
+        landed = walking & ((top + bottom) > 0)
+        velocity_x[walking & ~landed] *= -1
+        y[landed] = np.where(top > 0, first_row, last_row)[landed] * TILE_SIZE - TILE_SIZE
+
+    def draw(self, surface, alpha=1.0, camera_x=0):
+        """Blit the walking enemies inside the view between their previous and current position, straight from the arrays."""
+        n = self.count
+        x = self.x[:n]
+        visible = ((self.state[:n] == ENEMY_WALKING) &
+                   (x > camera_x - TILE_SIZE - CULL_MARGIN) & (x < camera_x + surface.get_width() + CULL_MARGIN))
+        previous_x, previous_y = self.previous_x[:n][visible], self.previous_y[:n][visible]
+        x = np.rint(previous_x + (x[visible] - previous_x) * alpha - camera_x).astype(int)
+        y = np.rint(previous_y + (self.y[:n][visible] - previous_y) * alpha).astype(int)
+        image = self.image
+        surface.blits([(image, position) for position in zip(x.tolist(), y.tolist())], doreturn=False)
+
+class Tile:
+    """Lightweight tile record; every tile of a type shares one image."""
+    __slots__ = ('rect', 'tile_type')
+    images = {}
+
+    def __init__(self, x, y, tile_type):
+        self.rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
+        self.tile_type = tile_type
+
+    @property
+    def image(self):
+        return Tile.get_image(self.tile_type)
+
+    @classmethod
+    def get_image(cls, tile_type):
+        image = cls.images.get(tile_type)
+        if image is None:
+            image = pygame.Surface((TILE_SIZE, TILE_SIZE))
+            image.fill(TILE_COLORS[tile_type])
+            cls.images[tile_type] = image
+        return image
+
+class TileGrid:
+    """Level tiles stored one byte per cell in a row-major array for compact storage and fast lookups."""
+    def __init__(self, level_design):
+        self.rows = len(level_design)
+        self.columns = len(level_design[0]) if level_design else 0
+        self.cells = array('B', chain.from_iterable(level_design))
+
+    @classmethod
+    def from_cells(cls, rows, columns, cells):
+        """Wrap an existing row-major byte buffer, such as a memory-mapped level, without copying it."""
+        grid = cls.__new__(cls)
+        grid.rows = rows
+        grid.columns = columns
+        grid.cells = cells
+        return grid
+
+    def __len__(self):
+        return int(np.count_nonzero(self.as_array()))
+
+    def get(self, col, row):
+        if 0 <= col < self.columns and 0 <= row < self.rows:
+            return self.cells[row * self.columns + col]
+        return 0
+
+    def set(self, col, row, tile_type):
+        self.cells[row * self.columns + col] = tile_type
+
+    def as_array(self):
+        """Zero-copy (rows, columns) NumPy view of the cells for batch lookups."""
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(self.rows, self.columns)
+
+    def region(self, first_col, last_col):
+        return self.as_array()[:, first_col:last_col]
+
+    def active_region(self):
+        """(first column, cells) of the part of the level that is simulated: all of it."""
+        return 0, self.as_array()
+
+    def stream(self, camera_x, view_width):
+        # The whole level is in memory, so there is nothing to load or evict
+        pass
+
+    def spritecollide(self, sprite):
+        """Return tiles colliding with sprite, in row-major order like a Group scan."""
+        rect = sprite.rect
+        first_col = max(rect.left // TILE_SIZE, 0)
+        last_col = min((rect.right - 1) // TILE_SIZE, self.columns - 1)
+        first_row = max(rect.top // TILE_SIZE, 0)
+        last_row = min((rect.bottom - 1) // TILE_SIZE, self.rows - 1)
+        collisions = []
+        for row in range(first_row, last_row + 1):
+            offset = row * self.columns
+            for col in range(first_col, last_col + 1):
+                tile_type = self.cells[offset + col]
+                if tile_type:
+                    tile = Tile(col * TILE_SIZE, row * TILE_SIZE, tile_type)
+                    if rect.colliderect(tile.rect):
+                        collisions.append(tile)
+        return collisions
+
+def chunk_path(directory, index):
+    return os.path.join(directory, f"chunk{index:06d}.bin")
+
+def save_level_chunks(level_design, directory, chunk_columns=CHUNK_COLUMNS):
+    """Write a level as a JSON header plus one raw row-major file of tile bytes per column chunk."""
+    cells = np.asarray(level_design, dtype=np.uint8)
+    rows, columns = cells.shape
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LEVEL_MANIFEST), "w") as file:
+        json.dump({"rows": rows, "columns": columns, "chunk_columns": chunk_columns}, file)
+    for index, first_col in enumerate(range(0, columns, chunk_columns)):
+        cells[:, first_col:first_col + chunk_columns].tofile(chunk_path(directory, index))
+
+class StreamingTileGrid:
+    """Tile grid streamed from a chunked level directory, so startup and memory don't grow with level length.
+
+    Chunks around the camera are read ahead on a background thread and chunks far from it are
+    dropped again; a chunk that is needed before its read finishes is waited for or read directly.
+    """
+    def __init__(self, directory, preload_chunks=LEVEL_PRELOAD_CHUNKS, keep_chunks=LEVEL_KEEP_CHUNKS):
+        with open(os.path.join(directory, LEVEL_MANIFEST)) as file:
+            header = json.load(file)
+        self.directory = directory
+        self.rows = header["rows"]
+        self.columns = header["columns"]
+        self.chunk_columns = header["chunk_columns"]
+        self.chunk_count = -(-self.columns // self.chunk_columns)
+        self.preload_chunks = preload_chunks
+        self.keep_chunks = keep_chunks
+
+        self.chunks = {}
+        self.pending = {}
+        self.modified = set()  # Edited chunks stay loaded, as the level on disk is never rewritten
+        self.loader = ThreadPoolExecutor(max_workers=1)
+        self.active = None
+        self.active_cells = None
+        self.stream(0, SCREEN_WIDTH)
+
+    def read_chunk(self, index):
+        return np.fromfile(chunk_path(self.directory, index), dtype=np.uint8).reshape(self.rows, -1)
+
+    def chunk(self, index):
+        chunk = self.chunks.get(index)
+        if chunk is None:
+            future = self.pending.pop(index, None)
+            chunk = future.result() if future else self.read_chunk(index)
+            self.chunks[index] = chunk
+        return chunk
+
+    def stream(self, camera_x, view_width):
+        """Queue reads for chunks near the view and evict chunks that fell far outside it."""
+        chunk_width = self.chunk_columns * TILE_SIZE
+        first = max(camera_x // chunk_width, 0)
+        last = min((camera_x + view_width - 1) // chunk_width, self.chunk_count - 1)
+
+        for index, future in list(self.pending.items()):
+            if future.done():
+                self.chunks[index] = future.result()
+                del self.pending[index]
+
+        active = (max(first - self.preload_chunks, 0), min(last + self.preload_chunks, self.chunk_count - 1))
+        for index in range(active[0], active[1] + 1):
+            if index not in self.chunks and index not in self.pending:
+                self.pending[index] = self.loader.submit(self.read_chunk, index)
+
+        for index in list(self.chunks):
+            if (index < first - self.keep_chunks or index > last + self.keep_chunks) and index not in self.modified:
+                del self.chunks[index]
+
+        if active != self.active:
+            self.active = active
+            self.active_cells = None
+
+    def get(self, col, row):
+        if 0 <= col < self.columns and 0 <= row < self.rows:
+            return int(self.chunk(col // self.chunk_columns)[row, col % self.chunk_columns])
+        return 0
+
+    def set(self, col, row, tile_type):
+        index = col // self.chunk_columns
+        self.chunk(index)[row, col % self.chunk_columns] = tile_type
+        self.modified.add(index)
+        self.active_cells = None
+
+    def region(self, first_col, last_col):
+        """(rows, columns) cells for a column range; a range inside one chunk is a view of it."""
+        last_col = min(last_col, self.columns)
+        if first_col >= last_col:
+            return np.zeros((self.rows, 0), dtype=np.uint8)
+        first, last = first_col // self.chunk_columns, (last_col - 1) // self.chunk_columns
+        offset = first * self.chunk_columns
+        if first == last:
+            cells = self.chunk(first)
         else:
-            self.rect.bottom = tile_collisions[0].rect.top
-
-class Tile(pygame.sprite.Sprite):
-    def __init__(self, x, y, color):
-        super().__init__()
-        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE))
-        self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+            cells = np.hstack([self.chunk(index) for index in range(first, last + 1)])
+        return cells[:, first_col - offset:last_col - offset]
+
+    def active_region(self):
+        """(first column, cells) of the chunks around the view, where enemies are simulated."""
+        first, last = self.active
+        if self.active_cells is None:
+            self.active_cells = self.region(first * self.chunk_columns, (last + 1) * self.chunk_columns)
+        return first * self.chunk_columns, self.active_cells
+
+    def spritecollide(self, sprite):
+        """Return tiles colliding with sprite, in row-major order like a Group scan."""
+        rect = sprite.rect
+        first_col = max(rect.left // TILE_SIZE, 0)
+        last_col = min((rect.right - 1) // TILE_SIZE, self.columns - 1)
+        first_row = max(rect.top // TILE_SIZE, 0)
+        last_row = min((rect.bottom - 1) // TILE_SIZE, self.rows - 1)
+        collisions = []
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                tile_type = self.get(col, row)
+                if tile_type:
+                    tile = Tile(col * TILE_SIZE, row * TILE_SIZE, tile_type)
+                    if rect.colliderect(tile.rect):
+                        collisions.append(tile)
+        return collisions
+
+def save_level_file(path, level_design, entities=()):
+    """Write a binary level: the header, the tile grid and a table of (kind, x, y) entities."""
+    cells = np.asarray(level_design, dtype=np.uint8)
+    table = np.array(list(entities), dtype=ENTITY_DTYPE)
+    rows, columns = cells.shape
+    with open(path, "wb") as file:
+        file.write(LEVEL_HEADER.pack(LEVEL_MAGIC, rows, columns, len(table)))
+        file.write(cells.tobytes())
+        file.write(table.tobytes())
+
+class LevelFile:
+    """Binary level file mapped into memory; the tile grid and entity table are views, nothing is copied.
+
+    The map is copy-on-write, so tile edits made while playing never reach the file.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, rows, columns, entity_count = LEVEL_HEADER.unpack_from(self.map)
+        if magic != LEVEL_MAGIC:
+            raise ValueError(f"{path} is not a level file")
+        cells_end = LEVEL_HEADER.size + rows * columns
+        self.tile_grid = TileGrid.from_cells(rows, columns, memoryview(self.map)[LEVEL_HEADER.size:cells_end])
+        self.entities = np.frombuffer(self.map, dtype=ENTITY_DTYPE, count=entity_count, offset=cells_end)
+
+class TileLayer:
+    """Static tiles pre-baked into cached column chunks, re-baked only when their tiles change."""
+    def __init__(self, tile_grid, chunk_columns=CHUNK_COLUMNS):
+        self.tile_grid = tile_grid
+        self.chunk_columns = chunk_columns
+        self.chunk_width = chunk_columns * TILE_SIZE
+        self.surfaces = {}
+        self.dirty = set()
+
+    def mark_dirty(self, col):
+        """Schedule a re-bake of the chunk holding tile column col after its tiles changed."""
+        self.dirty.add(col // self.chunk_columns)
+
+    def bake(self, index):
+        grid = self.tile_grid
+        first_col = index * self.chunk_columns
+        cells = grid.region(first_col, first_col + self.chunk_columns)
+        chunk = None
+        for row, col in zip(*np.nonzero(cells)):
+            if chunk is None:
+                chunk = pygame.Surface((self.chunk_width, grid.rows * TILE_SIZE), pygame.SRCALPHA)
+            chunk.blit(Tile.get_image(int(cells[row, col])), (int(col) * TILE_SIZE, int(row) * TILE_SIZE))
+        self.surfaces[index] = chunk
+
+    def draw(self, surface, camera_x=0):
+        first = max(camera_x // self.chunk_width, 0)
+        last = (camera_x + surface.get_width() - 1) // self.chunk_width
+        for index in range(first, last + 1):
+            if index in self.dirty or index not in self.surfaces:
+                self.bake(index)
+                self.dirty.discard(index)
+            chunk = self.surfaces[index]
+            if chunk is not None:
+                surface.blit(chunk, (index * self.chunk_width - camera_x, 0))
+
+        # Drop chunks the camera has left far behind, so long levels don't pile up surfaces
+        for index in list(self.surfaces):
+            if index < first - LEVEL_KEEP_CHUNKS or index > last + LEVEL_KEEP_CHUNKS:
+                del self.surfaces[index]
+
+class Mode7Background:
+    """Mode 7 style background: a tiled texture rotated and scaled per scanline into a reused buffer."""
+    def __init__(self, width, height, source):
+        self.width = width
+        self.height = height
+        self.color = None
+        if isinstance(source, pygame.Surface):
+            pixels = pygame.surfarray.array3d(source)
+            if (pixels == pixels[0, 0]).all():
+                self.color = tuple(int(c) for c in pixels[0, 0])
+        else:
+            self.color = source
+
+        if self.color is None:
+            # Flattened so texel (x, y) sits at x * texture_height + y
+            self.texture_width, self.texture_height = pixels.shape[:2]
+            self.texture = pixels.reshape(-1, 3)
+            self.columns = np.arange(width, dtype=np.float32)[:, None] - width / 2
+            self.rows = np.arange(height, dtype=np.float32) - height / 2
+            self.u = np.empty((width, height), dtype=np.float32)
+            self.v = np.empty((width, height), dtype=np.float32)
+            self.index = np.empty((width, height), dtype=np.intp)
+            self.buffer = np.empty((width, height, 3), dtype=np.uint8)
+            self.surface = pygame.Surface((width, height))
+            self.params = None
+
+    def scanline_params(self, angle, scale):
+        """Return per-scanline texture start (u0, v0) and the per-pixel step (du, dv)."""
+        radians = math.radians(angle)
+        du = math.cos(radians) / scale
+        dv = math.sin(radians) / scale
+        u0 = self.texture_width / 2 - self.rows * dv
+        v0 = self.texture_height / 2 + self.rows * du
+        return u0, v0, du, dv
+
+    def sample(self, angle, scale):
+        u0, v0, du, dv = self.scanline_params(angle, scale)
+        np.multiply(self.columns, du, out=self.u)
+        self.u += u0
+        np.remainder(self.u, self.texture_width, out=self.u)
+        np.multiply(self.columns, dv, out=self.v)
+        self.v += v0
+        np.remainder(self.v, self.texture_height, out=self.v)
+
+        self.index[...] = self.u
+        self.index *= self.texture_height
+        np.add(self.index, self.v, out=self.index, casting='unsafe')
+        np.take(self.texture, self.index, axis=0, out=self.buffer, mode='wrap')
+        pygame.surfarray.blit_array(self.surface, self.buffer)
+
+    def render(self, surface, angle, scale):
+        # The background covers a centered frame scaled with the effect, black outside it
+        scaled_width = int(self.width * scale)
+        scaled_height = int(self.height * scale)
+        frame = pygame.Rect((self.width - scaled_width) // 2, (self.height - scaled_height) // 2,
+                            scaled_width, scaled_height)
+        surface.fill(BLACK)
+
+        if self.color is not None:
+            # Rotating and scaling a solid fill changes nothing but the frame size
+            surface.fill(self.color, frame)
+            return
+
+        if self.params != (angle, scale):
+            self.sample(angle, scale)
+            self.params = (angle, scale)
+        frame = frame.clip(surface.get_rect())
+        surface.blit(self.surface, frame.topleft, frame)
+
+def make_level_design(columns, tiles, rows=LEVEL_ROWS):
+    """Random level design: a solid floor plus tiles platform tiles scattered above it."""
+    level_design = [[0] * columns for _ in range(rows)]
+    level_design[-1] = [1] * columns
+    tiles = min(tiles, (rows - 5) * columns)
+    placed = 0
+    while placed < tiles:
+        row = random.randrange(4, rows - 1)
+        col = random.randrange(columns)
+        for c in range(col, min(col + random.randint(2, 4), columns)):
+            if placed < tiles and not level_design[row][c]:
+                level_design[row][c] = random.choice((1, 2))
+                placed += 1
+    return level_design
+
+def draw_interpolated(surface, sprites, alpha, camera_x=0):
+    """Blit the sprites inside the view between their previous and current physics positions."""
+    view = surface.get_rect(left=camera_x).inflate(CULL_MARGIN * 2, CULL_MARGIN * 2)
+    for sprite in sprites:
+        if not view.colliderect(sprite.rect):
+            continue
+        previous_x, previous_y = sprite.previous_position
+        x = previous_x + (sprite.rect.x - previous_x) * alpha
+        y = previous_y + (sprite.rect.y - previous_y) * alpha
+        surface.blit(sprite.image, (round(x) - camera_x, round(y)))
+
+class ScriptedInput:
+    """Replays a looping script of (frames, keys) steps in place of pygame.key for headless runs."""
+    def __init__(self, script):
+        self.frames = [frozenset(keys) for count, keys in script for _ in range(count)]
+        self.frame = 0
+
+    def get_pressed(self):
+        keys = self.frames[self.frame % len(self.frames)]
+        self.frame += 1
+        return ScriptedKeys(keys)
+
+class ScriptedKeys:
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+# Default headless input: both players run right, jump, run back left, then stand still
+HEADLESS_SCRIPT = [
+    (60, [pygame.K_RIGHT, pygame.K_d]),
+    (10, [pygame.K_RIGHT, pygame.K_d, pygame.K_SPACE, pygame.K_w]),
+    (60, [pygame.K_LEFT, pygame.K_a]),
+    (30, []),
+]
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False):
+        # Headless runs use SDL's dummy video driver, so no window is ever shown
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        self.input_source = pygame.key
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Super Mario FX")
         self.clock = pygame.time.Clock()
         self.running = True
 
-        self.mario = Player(100, 0, RED)  # Start Mario higher
-        self.luigi = Player(160, 0, GREEN) # Start Luigi higher
+        self.players = [
+            Player(100, 0, RED),  # Start Mario higher
+            Player(160, 0, GREEN),  # Start Luigi higher
+        ]
 
-        self.enemies = pygame.sprite.Group()
-        self.enemies.add(Enemy(400, 0))
-        self.enemies.add(Enemy(600, 0))
+        self.enemies = EnemyStore()
+        self.enemies.add(400, 0)
+        self.enemies.add(600, 0)
 
-        self.tiles = pygame.sprite.Group()
+        self.camera_x = 0  # Left edge of the view in level pixels
+        self.previous_camera_x = 0
         self.load_level() # Load the level design
 
-        self.all_sprites = pygame.sprite.Group()
-        self.all_sprites.add(self.mario)
-        self.all_sprites.add(self.luigi)
-        self.all_sprites.add(self.enemies)
-        self.all_sprites.add(self.tiles)
+        self.all_sprites = pygame.sprite.Group(self.players)
 
         self.background_angle = 0
         self.background_scale = 1.0
         self.background_scale_speed = 0.005  # Slower background scaling
+        self.background = Mode7Background(SCREEN_WIDTH, SCREEN_HEIGHT, EMPTY_COLOR)
+
+    def load_level(self, path=None):
+        if path is not None and os.path.isdir(path):
+            # Long levels stream their column chunks from disk around the camera
+            self.tile_grid = StreamingTileGrid(path)
+            self.tile_layer = TileLayer(self.tile_grid)
+            return
+        if path is not None:
+            # Binary levels are memory-mapped, and their entity table places players and enemies
+            level = LevelFile(path)
+            self.tile_grid = level.tile_grid
+            self.tile_layer = TileLayer(self.tile_grid)
+            if len(level.entities):
+                self.spawn_entities(level.entities)
+            return
 
-    def load_level(self):
         # Example level design using a 2D list
         level_design = [
             [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
@@ -162,16 +674,46 @@ class Game:
             [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
         ]
 
-        # Iterate through the level design and create tiles
-        for row_index, row in enumerate(level_design):
-            for col_index, tile_type in enumerate(row):
-                x = col_index * TILE_SIZE
-                y = row_index * TILE_SIZE
-                if tile_type == 1:
-                    self.tiles.add(Tile(x, y, GROUND_COLOR))
-                elif tile_type == 2:
-                    self.tiles.add(Tile(x, y, BRICK_COLOR))
-                # 0 represents empty space, no tile needed
+        # Store tile types in a compact grid; tile images are shared per type
+        self.tile_grid = TileGrid(level_design)
+        self.tile_layer = TileLayer(self.tile_grid)
+
+    def spawn_entities(self, entities):
+        """Replace the players and enemies with those in an entity table."""
+        players = entities[entities["kind"] == ENTITY_PLAYER]
+        self.players = [Player(int(entity["x"]), int(entity["y"]), PLAYER_COLORS[i % len(PLAYER_COLORS)])
+                        for i, entity in enumerate(players)]
+        self.all_sprites = pygame.sprite.Group(self.players)
+
+        self.enemies = EnemyStore()
+        enemies = entities[entities["kind"] == ENTITY_ENEMY]
+        for x, y in zip(enemies["x"].tolist(), enemies["y"].tolist()):
+            self.enemies.add(x, y)
+
+    def level_entities(self):
+        """Entity table of the current players and enemies, for saving with the level."""
+        n = self.enemies.count
+        return ([(ENTITY_PLAYER, player.rect.x, player.rect.y) for player in self.players] +
+                [(ENTITY_ENEMY, x, y) for x, y in zip(self.enemies.x[:n].tolist(), self.enemies.y[:n].tolist())])
+
+    def load_scenario(self, enemies=2, players=2, columns=25, tiles=22, seed=0):
+        """Replace the level, players and enemies with a seeded stress scenario."""
+        random.seed(seed)
+        self.tile_grid = TileGrid(make_level_design(columns, tiles))
+        self.tile_layer = TileLayer(self.tile_grid)
+        level_width = columns * TILE_SIZE
+
+        self.players = [Player((100 + 60 * i) % level_width, 0, PLAYER_COLORS[i % len(PLAYER_COLORS)])
+                        for i in range(players)]
+        self.all_sprites = pygame.sprite.Group(self.players)
+
+        self.enemies = EnemyStore()
+        for _ in range(enemies):
+            self.enemies.add(random.randrange(max(level_width - TILE_SIZE, 1)), 0)
+
+    def set_tile(self, col, row, tile_type):
+        self.tile_grid.set(col, row, tile_type)
+        self.tile_layer.mark_dirty(col)
 
     def show_menu(self):
         menu_font = pygame.font.Font(None, 50)
@@ -203,36 +745,25 @@ class Game:
                         exit()
 
     def handle_input(self):
-        keys = pygame.key.get_pressed()
+        keys = self.input_source.get_pressed()
 
-        if keys[pygame.K_LEFT]:
-            self.mario.velocity_x = -PLAYER_SPEED
-        elif keys[pygame.K_RIGHT]:
-            self.mario.velocity_x = PLAYER_SPEED
-        else:
-            self.mario.velocity_x = 0
+        for i, player in enumerate(self.players):
+            left, right, jump = PLAYER_CONTROLS[i % len(PLAYER_CONTROLS)]
+            if keys[left]:
+                player.velocity_x = -PLAYER_SPEED
+            elif keys[right]:
+                player.velocity_x = PLAYER_SPEED
+            else:
+                player.velocity_x = 0
 
-        if keys[pygame.K_a]:
-            self.luigi.velocity_x = -PLAYER_SPEED
-        elif keys[pygame.K_d]:
-            self.luigi.velocity_x = PLAYER_SPEED
-        else:
-            self.luigi.velocity_x = 0
-
-        if keys[pygame.K_SPACE]:
-            self.mario.jump()
-        if keys[pygame.K_w]:
-            self.luigi.jump()
+            if keys[jump]:
+                player.jump()
 
     def update(self):
-        self.mario.update(self.tiles)
-        self.luigi.update(self.tiles)
-        self.enemies.update(self.tiles)
-
-    def draw(self):
-        # Apply Mode 7-like background effect (rotation + scaling)
-        background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        background.fill(EMPTY_COLOR) # Set background to light blue
+        self.tile_grid.stream(self.camera_x, SCREEN_WIDTH)
+        for player in self.players:
+            player.update(self.tile_grid)
+        self.enemies.update(self.tile_grid)
 
         # Rotate and scale the background
         self.background_angle += BACKGROUND_ROTATION_SPEED
@@ -240,41 +771,101 @@ class Game:
         if self.background_scale > BACKGROUND_MAX_SCALE or self.background_scale < BACKGROUND_MIN_SCALE:
             self.background_scale_speed *= -1  # Reverse the scaling direction
 
-        # Rotate and scale the background
-        rotated_background = pygame.transform.rotate(background, self.background_angle)
-        scaled_width = int(SCREEN_WIDTH * self.background_scale)
-        scaled_height = int(SCREEN_HEIGHT * self.background_scale)
-        scaled_background = pygame.transform.scale(rotated_background, (scaled_width, scaled_height))
+        self.update_camera()
+
+    def update_camera(self):
+        """Scroll to keep the players centered, without showing past either end of the level."""
+        if not self.players:
+            return
+        center_x = sum(player.rect.centerx for player in self.players) // len(self.players)
+        level_width = self.tile_grid.columns * TILE_SIZE
+        self.camera_x = max(min(center_x - SCREEN_WIDTH // 2, level_width - SCREEN_WIDTH), 0)
 
-        # Center the scaled background
-        bg_x = (SCREEN_WIDTH - scaled_width) // 2
-        bg_y = (SCREEN_HEIGHT - scaled_height) // 2
+    def draw(self, alpha=1.0):
+        # Draw Mode 7 background
+        self.background.render(self.screen, self.background_angle, self.background_scale)
 
-        # Draw background
-        self.screen.fill(BLACK)
-        self.screen.blit(scaled_background, (bg_x, bg_y))
+        # Only what the camera sees is drawn, so drawing cost follows the screen, not the level
+        camera_x = round(self.previous_camera_x + (self.camera_x - self.previous_camera_x) * alpha)
 
-        # Draw tiles
-        self.tiles.draw(self.screen)
+        # Draw tiles from the pre-baked chunks
+        self.tile_layer.draw(self.screen, camera_x)
 
         # Draw sprites
-        self.all_sprites.draw(self.screen)
+        draw_interpolated(self.screen, self.all_sprites, alpha, camera_x)
+        self.enemies.draw(self.screen, alpha, camera_x)
         pygame.display.flip()
 
+    def step(self):
+        """Advance the simulation by one fixed physics step."""
+        for sprite in self.all_sprites:
+            sprite.previous_position = sprite.rect.topleft
+        self.enemies.save_positions()
+        self.previous_camera_x = self.camera_x
+        self.handle_input()
+        self.update()
+
+    def run_headless(self, frames, script=HEADLESS_SCRIPT):
+        """Step input and physics frames times with no menu, drawing or frame cap; return simulated fps."""
+        self.input_source = ScriptedInput(script)
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.step()
+        return frames / (time.perf_counter() - start)
+
     def run(self):
         self.show_menu()
+        accumulator = 0.0
+        previous_time = time.perf_counter()
         while self.running:
+            now = time.perf_counter()
+            accumulator += min(now - previous_time, MAX_FRAME_TIME)
+            previous_time = now
+
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
 
-            self.handle_input()
-            self.update()
-            self.draw()
-            self.clock.tick(60)
+            # Catch up with as many physics steps as the elapsed time needs, then render once
+            while accumulator >= PHYSICS_STEP:
+                self.step()
+                accumulator -= PHYSICS_STEP
+            self.draw(accumulator / PHYSICS_STEP)
+            self.clock.tick(MAX_RENDER_FPS)
 
         pygame.quit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(description="Super Mario FX")
+    parser.add_argument("--headless", type=int, metavar="FRAMES",
+                        help="simulate FRAMES fixed steps without a window and report simulated fps")
+    parser.add_argument("--enemies", type=int, help="stress scenario: number of enemies")
+    parser.add_argument("--players", type=int, help="stress scenario: number of players, taking turns on Mario's and Luigi's keys")
+    parser.add_argument("--columns", type=int, help="stress scenario: level width in tiles")
+    parser.add_argument("--tiles", type=int, help="stress scenario: platform tiles scattered above the floor")
+    parser.add_argument("--seed", type=int, help="stress scenario: random seed (default 0)")
+    parser.add_argument("--level", metavar="PATH",
+                        help=f"play a {LEVEL_EXTENSION} level file, or a chunked level streamed from a directory")
+    parser.add_argument("--save-level", metavar="PATH",
+                        help=f"write the level (e.g. a stress scenario's) and exit: a {LEVEL_EXTENSION} path gets a "
+                             "binary level file with its players and enemies, any other path a directory of chunks")
+    args = parser.parse_args()
+    scenario = {name: value for name, value in vars(args).items()
+                if name in ("enemies", "players", "columns", "tiles", "seed") and value is not None}
+    game = Game(headless=bool(args.headless))
+    if scenario:
+        game.load_scenario(**scenario)
+    if args.level:
+        game.load_level(args.level)
+    if args.save_level:
+        cells = game.tile_grid.region(0, game.tile_grid.columns)
+        if args.save_level.endswith(LEVEL_EXTENSION):
+            save_level_file(args.save_level, cells, game.level_entities())
+        else:
+            save_level_chunks(cells, args.save_level)
+        print(f"Saved a {game.tile_grid.columns}x{game.tile_grid.rows} level to {args.save_level}")
+    elif args.headless:
+        fps = game.run_headless(args.headless)
+        print(f"Simulated {args.headless} frames at {fps:.0f} fps")
+    else:
+        game.run()